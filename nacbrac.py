@@ -1,10 +1,20 @@
 import pdb
 from abc import ABC, abstractmethod
+from array import array
 from dataclasses import dataclass, field
 from enum import Enum, unique
-from typing import List, Union, Set
+from typing import Callable, Iterator, List, Optional, Union, Set, Dict, Tuple
+import ctypes
 import datetime
+import heapq
+import itertools
+import multiprocessing
+import queue
+import random
 import re
+import sys
+import threading
+import time
 
 @unique
 class Suit(Enum):
@@ -13,11 +23,24 @@ class Suit(Enum):
     Spade = "S"
     Club = "C"
 
-@dataclass
+# suit order used by the packed card codes, do not reorder
+SUIT_CODES = {Suit.Heart: 0, Suit.Diamond: 1, Suit.Spade: 2, Suit.Club: 3}
+CODE_SUITS = {code: suit for suit, code in SUIT_CODES.items()}
+# card values fit in 4 bits of the card codes
+MAX_CARD_VALUE = 15
+
+@dataclass(frozen=True)
 class Card:
+    __slots__ = ("value", "suit", "code")
     value: int
     suit: Suit
 
+    def __post_init__(self):
+        if not 0 <= self.value <= MAX_CARD_VALUE:
+            raise ValueError(f"Invalid card {self.value}{self.suit.value}!")
+        # small positive int identifying the card, 0 is reserved for "no card" / slot separator
+        object.__setattr__(self, "code", (self.value << 2) + SUIT_CODES[self.suit] + 1)
+
     def is_face(self):
         return self.value < 6 or self.value > 10
 
@@ -34,7 +57,51 @@ class Card:
     def from_str(source: str):
         value_str = source[:-1]
         suit_str = source[-1]
-        return Card(value=int(value_str), suit=Suit(suit_str))
+        value = int(value_str)
+        if not 0 <= value <= MAX_CARD_VALUE:
+            raise ValueError(f"Invalid card {source}!")
+        return Card.from_code((value << 2) + SUIT_CODES[Suit(suit_str)] + 1)
+
+    @staticmethod
+    def from_code(code: int):
+        if not 0 < code < MAX_CARD_CODE:
+            raise ValueError(f"Invalid card code {code}!")
+        return CARDS[code]
+
+    def __reduce__(self):
+        # unpickle to the shared instance, frozen slots can't be restored by attribute assignment
+        return (Card.from_code, (self.code,))
+
+# one shared instance per card code, CARDS[0] stands for "no card"
+MAX_CARD_CODE = 64
+CARDS: List[Card] = [None] + [Card(value=(code - 1) >> 2, suit=CODE_SUITS[(code - 1) & 3]) for code in range(1, MAX_CARD_CODE)]
+
+# lookup tables indexed by Card.code for the solver hot paths
+IS_FACE: List[bool] = [card is not None and card.is_face() for card in CARDS]
+IS_RED: List[bool] = [card is not None and card.is_red() for card in CARDS]
+
+def _stacks_on(card: Card, below: Card) -> bool:
+    if card is None or below is None:
+        return False
+    if card.is_face() and below.is_face():
+        return card.suit == below.suit
+    elif not (card.is_face() or below.is_face()):
+        return below.value == card.value + 1 and card.is_red() != below.is_red()
+    return False
+
+# STACKS_ON[card.code][below.code]: card can be placed on below.
+# a legal run is a sequence where every card stacks on the one before it
+STACKS_ON: List[List[bool]] = [[_stacks_on(card, below) for below in CARDS] for card in CARDS]
+# TARGETS[card.code]: codes of the cards card can be placed on
+TARGETS: List[List[int]] = [[below for below in range(0, len(CARDS)) if STACKS_ON[code][below]] for code in range(0, len(CARDS))]
+
+# Zobrist keys, ZOBRIST_FIELD[position][card.code] for a card at that height in a field slot and
+# ZOBRIST_WILDCARD[card.code] for the wildcard card. A slot hashes to the xor of its cards' keys; the board sums
+# its slot hashes instead of keying them by slot, so column permutations of a board share a hash.
+_zobrist_random = random.Random(0x4e616362)
+ZOBRIST_FIELD: List[List[int]] = [[_zobrist_random.getrandbits(64) for _ in CARDS] for _ in range(0, 37)]
+ZOBRIST_WILDCARD: List[int] = [_zobrist_random.getrandbits(64) for _ in CARDS]
+ZOBRIST_MASK = (1 << 64) - 1
 
 class WildcardSlot:
     def __init__(self, card: Card=None):
@@ -73,8 +140,9 @@ class Move:
     before: int # slot idx, negative means wildcard slot
     after: int # slot idx, negative means wildcard slot
     num_cards: int # num of cards to be moved
-    before_idx: int # idx of the bottom card to be moved
-    after_idx: int = -1 # idx of the card to be moved to
+    # screen positions for the bot, derived from the board the move is made on, see Gameboard.locate
+    before_idx: int = field(default=-1, compare=False) # idx of the bottom card to be moved
+    after_idx: int = field(default=-1, compare=False) # idx of the card to be moved to
 
     def is_before_wildcard_slot(self) -> bool:
         return self.before < 0
@@ -82,6 +150,38 @@ class Move:
     def is_after_wildcard_slot(self) -> bool:
         return self.after < 0
 
+    def relabel(self, slot_map: List[int]):
+        """
+        translate the field slot indices of this move, slot_map[i] is the new index of slot i
+        e.g. relabel(gameboard.canonical_order()) maps a move on the canonical board back to gameboard
+        """
+        before = self.before if self.before < 0 else slot_map[self.before]
+        after = self.after if self.after < 0 else slot_map[self.after]
+        return Move(before, after, self.num_cards, self.before_idx, self.after_idx)
+
+# Moves as packed ints, so generating and ordering them allocates no Move until one is tried, see unpack_move.
+# From the low bits: after_idx+1 and before_idx+1 (6 bits each), num_cards (3 bits), after+1 and before+1 (4 bits
+# each), the code of the (bottom) card moved (6 bits), and the move's score above that.
+MOVE_CARD_SHIFT = 23
+MOVE_SCORE_SHIFT = 29
+# static scores, any other move scores 0. Emptying a slot, freeing the wildcard slot or uncovering any face first was
+# no better on 2000 deals
+SCORE_COMPLETES = 2 # completes a slot, played alone when forced
+SCORE_UNCOVERS_FACE = 1 # leaves a buried face card on top of its slot that can move on right away
+
+def pack_move(before: int, after: int, num_cards: int, before_idx: int, after_idx: int, code: int, score: int) -> int:
+    return (score << MOVE_SCORE_SHIFT) | (code << MOVE_CARD_SHIFT) | ((before + 1) << 19) | ((after + 1) << 15) \
+        | (num_cards << 12) | ((before_idx + 1) << 6) | (after_idx + 1)
+
+def move_score(packed: int) -> int:
+    return packed >> MOVE_SCORE_SHIFT
+
+def moved_card_code(packed: int) -> int:
+    return (packed >> MOVE_CARD_SHIFT) & 63
+
+def unpack_move(packed: int) -> Move:
+    return Move(((packed >> 19) & 15) - 1, ((packed >> 15) & 15) - 1, (packed >> 12) & 7, ((packed >> 6) & 63) - 1, (packed & 63) - 1)
+
 def empty_field_slots():
     return [[], [], [], [], [], [], [], [], []]
 
@@ -120,141 +220,398 @@ class Gameboard:
             assert sum([1 for card in cards_of_value if card.is_red()]) == 2, f"There should be 2 red 2 black for cards of value {unique_value}"
         return True
 
+    def __post_init__(self):
+        # per field slot cache, kept up to date by execute/undo for the slots a move touches:
+        # length of the movable run on top of the slot, and whether the slot is done
+        self._run_lengths: List[int] = [0] * len(self.field_slots)
+        self._done: List[bool] = [True] * len(self.field_slots)
+        for idx in range(0, len(self.field_slots)):
+            self._update_slot_cache(idx)
+        # Zobrist hash, kept up to date by execute/undo in O(cards moved): the sum of the slot hashes and the
+        # wildcard card's key, equal for column permutations like canonical_encode()
+        self._slot_hashes: List[int] = [0] * len(self.field_slots)
+        for idx, field_slot in enumerate(self.field_slots):
+            for position, card in enumerate(field_slot):
+                self._slot_hashes[idx] ^= ZOBRIST_FIELD[position][card.code]
+        self.zobrist = sum(self._slot_hashes)
+        if self.wildcard_slot.has_card():
+            self.zobrist += ZOBRIST_WILDCARD[self.wildcard_slot.card.code]
+        self.zobrist &= ZOBRIST_MASK
+
+    def _update_slot_cache(self, idx: int) -> None:
+        field_slot = self.field_slots[idx]
+        run_length = min(len(field_slot), 1)
+        while run_length < len(field_slot) and STACKS_ON[field_slot[-run_length].code][field_slot[-(run_length+1)].code]:
+            run_length += 1
+        self._run_lengths[idx] = run_length
+        self._done[idx] = run_length == len(field_slot) and self._is_complete_run(field_slot)
+
     def execute(self, move: Move) -> None:
         if move.is_after_wildcard_slot():
-            card = self.field_slots[move.before].pop()
-            self.wildcard_slot.push(card)
+            self._to_wildcard_slot(move.before)
         elif move.is_before_wildcard_slot():
-            card = self.wildcard_slot.pop()
-            self.field_slots[move.after].append(card)
+            self._from_wildcard_slot(move.after)
         else:
-            cards = self.field_slots[move.before][-move.num_cards:]
-            self.field_slots[move.after].extend(cards)
-            before_list = self.field_slots[move.before]
-            self.field_slots[move.before] = before_list[:(len(before_list)-move.num_cards)]
+            self._transfer(move.before, move.after, move.num_cards)
 
     def undo(self, move: Move) -> None:
         if move.is_after_wildcard_slot():
-            card = self.wildcard_slot.pop()
-            self.field_slots[move.before].append(card)
+            self._from_wildcard_slot(move.before)
         elif move.is_before_wildcard_slot():
-            card = self.field_slots[move.after].pop()
-            self.wildcard_slot.push(card)
+            self._to_wildcard_slot(move.after)
         else:
-            cards = self.field_slots[move.after][-move.num_cards:]
-            self.field_slots[move.before].extend(cards)
-            after_list = self.field_slots[move.after]
-            self.field_slots[move.after] = after_list[:(len(after_list)-move.num_cards)]
+            self._transfer(move.after, move.before, move.num_cards)
+
+    def _to_wildcard_slot(self, idx: int) -> None:
+        field_slot = self.field_slots[idx]
+        card = field_slot.pop()
+        self.wildcard_slot.push(card)
+        slot_hash = self._slot_hashes[idx] ^ ZOBRIST_FIELD[len(field_slot)][card.code]
+        self.zobrist = (self.zobrist + slot_hash - self._slot_hashes[idx] + ZOBRIST_WILDCARD[card.code]) & ZOBRIST_MASK
+        self._slot_hashes[idx] = slot_hash
+        self._update_slot_cache(idx)
+
+    def _from_wildcard_slot(self, idx: int) -> None:
+        field_slot = self.field_slots[idx]
+        card = self.wildcard_slot.pop()
+        slot_hash = self._slot_hashes[idx] ^ ZOBRIST_FIELD[len(field_slot)][card.code]
+        field_slot.append(card)
+        self.zobrist = (self.zobrist + slot_hash - self._slot_hashes[idx] - ZOBRIST_WILDCARD[card.code]) & ZOBRIST_MASK
+        self._slot_hashes[idx] = slot_hash
+        self._update_slot_cache(idx)
+
+    def _transfer(self, from_idx: int, to_idx: int, num_cards: int) -> None:
+        from_slot = self.field_slots[from_idx]
+        to_slot = self.field_slots[to_idx]
+        from_hash = self._slot_hashes[from_idx]
+        to_hash = self._slot_hashes[to_idx]
+        from_position = len(from_slot) - num_cards
+        to_position = len(to_slot)
+        for i in range(0, num_cards):
+            code = from_slot[from_position + i].code
+            from_hash ^= ZOBRIST_FIELD[from_position + i][code]
+            to_hash ^= ZOBRIST_FIELD[to_position + i][code]
+        self.zobrist = (self.zobrist + from_hash - self._slot_hashes[from_idx] + to_hash - self._slot_hashes[to_idx]) & ZOBRIST_MASK
+        self._slot_hashes[from_idx] = from_hash
+        self._slot_hashes[to_idx] = to_hash
+        to_slot.extend(from_slot[from_position:])
+        del from_slot[from_position:]
+        self._update_slot_cache(from_idx)
+        self._update_slot_cache(to_idx)
+
+    def locate(self, move: Move) -> Move:
+        """
+        move with before_idx/after_idx filled in for this board, as the move generators do
+        """
+        if move.is_before_wildcard_slot():
+            before_idx = -1
+        else:
+            before_idx = len(self.field_slots[move.before]) - move.num_cards
+        if move.is_after_wildcard_slot():
+            after_idx = -1
+        else:
+            after_idx = max(len(self.field_slots[move.after]) - 1, 0)
+        return Move(move.before, move.after, move.num_cards, before_idx, after_idx)
 
     def solved(self) -> bool:
         if self.wildcard_slot.has_card():
             return False
-        return all([self._is_field_slot_done(field_slot) for field_slot in self.field_slots])
+        return all(self._done)
 
     def get_field_slot_moves(self) -> List[Move]:
         """
         generate field slot moves first, then consider wildcard slot
         """
-        valid_moves: List[Move] = []
+        return [unpack_move(packed) for packed in self.packed_field_slot_moves()]
+
+    def get_wildcard_slot_moves(self) -> List[Move]:
+        return [unpack_move(packed) for packed in self.packed_wildcard_slot_moves()]
+
+    def packed_field_slot_moves(self) -> List[int]:
+        """
+        the field slot moves as packed ints with their static score, see pack_move
+        """
+        valid_moves: List[int] = []
+        field_slots = self.field_slots
+        run_lengths = self._run_lengths
+        # slot idxs by the code of their top card, 0 for the empty ones
+        slots_by_top: List[Optional[List[int]]] = [None] * MAX_CARD_CODE
+        for idx, field_slot in enumerate(field_slots):
+            code = field_slot[-1].code if field_slot else 0
+            if slots_by_top[code] is None:
+                slots_by_top[code] = [idx]
+            else:
+                slots_by_top[code].append(idx)
+        empty_slots = slots_by_top[0] or []
         for from_idx in range(0, 9):
             # skip if the field slot is already sorted (including empty slot)
-            if self._is_field_slot_done(self.field_slots[from_idx]):
+            if self._done[from_idx]:
                 continue
 
-            for to_idx in range(0, 9):
-                if from_idx == to_idx:
-                    continue
-
-                from_slot = self.field_slots[from_idx]
-                to_slot = self.field_slots[to_idx]
-                for num_cards in range(len(from_slot), 0, -1):
-                    cards_to_move = from_slot[-num_cards:]
-                    if self._can_move_cards(cards_to_move, to_slot):
-                        # don't move the whole stack to empty slot and leave an empty slot
+            from_slot = field_slots[from_idx]
+            run_length = run_lengths[from_idx]
+            # (to_idx, num_cards) the top run fits onto, the whole run that fits, partial moves are ignored.
+            # A face run is all of one suit and moves whole, a value run descends one by one, so only the card right
+            # below a value can go onto it
+            targets: List[Tuple[int, int]] = []
+            for num_cards in (run_length,) if IS_FACE[from_slot[-1].code] else range(1, run_length + 1):
+                for code in TARGETS[from_slot[-num_cards].code]:
+                    for to_idx in slots_by_top[code] or ():
                         # don't move values from sub-stack to another sub-stack (noop)
-                        if (not (not to_slot and num_cards == len(from_slot))) \
-                            and (not (not from_slot[-num_cards].is_face() and len(to_slot) > 0 and num_cards < len(from_slot) and from_slot[-(num_cards+1)].value == to_slot[-1].value)):
-                            valid_moves.append(Move(from_idx, to_idx, num_cards, len(from_slot) - num_cards, max(len(to_slot) - 1, 0)))
-                        # move the whole stack, ignore partial moves
-                        break
+                        if to_idx != from_idx and not (num_cards < len(from_slot) and not IS_FACE[code] and from_slot[-(num_cards+1)].value == CARDS[code].value):
+                            targets.append((to_idx, num_cards))
+            # don't move the whole stack to empty slot and leave an empty slot
+            if run_length < len(from_slot):
+                targets.extend([(to_idx, run_length) for to_idx in empty_slots])
+            if len(targets) > 1:
+                targets.sort()
+
+            for to_idx, num_cards in targets:
+                to_slot = field_slots[to_idx]
+                if to_slot and len(to_slot) == run_lengths[to_idx] and self._completes_run(to_slot, num_cards):
+                    score = SCORE_COMPLETES
+                elif num_cards < len(from_slot) and IS_FACE[from_slot[-(num_cards+1)].code] \
+                        and (empty_slots or any(slots_by_top[code] for code in TARGETS[from_slot[-(num_cards+1)].code])):
+                    score = SCORE_UNCOVERS_FACE
+                else:
+                    score = 0
+                valid_moves.append(pack_move(from_idx, to_idx, num_cards, len(from_slot) - num_cards, max(len(to_slot) - 1, 0),
+                                             from_slot[-num_cards].code, score))
         return valid_moves
 
-    def get_wildcard_slot_moves(self) -> List[Move]:
-        valid_moves: List[Move] = []
+    def packed_wildcard_slot_moves(self) -> List[int]:
+        valid_moves: List[int] = []
         if self.wildcard_slot.has_card(): # wildcard slot to field
+            code = self.wildcard_slot.peek().code
             for to_idx, field_slot in enumerate(self.field_slots):
-                if self._can_move_cards(self.wildcard_slot.peek(), field_slot):
-                    valid_moves.append(Move(-1, to_idx, 1, -1, max(len(field_slot) - 1), 0))
+                if not field_slot:
+                    valid_moves.append(pack_move(-1, to_idx, 1, -1, 0, code, 0))
+                elif STACKS_ON[code][field_slot[-1].code]:
+                    completes = len(field_slot) == self._run_lengths[to_idx] and self._completes_run(field_slot, 1)
+                    valid_moves.append(pack_move(-1, to_idx, 1, -1, len(field_slot) - 1, code, SCORE_COMPLETES if completes else 0))
         else: # field to wildcard slot
             for from_idx, field_slot in enumerate(self.field_slots):
-                if len(field_slot) > 1:
-                    last_card = field_slot[-1]
-                    prev_card = field_slot[-2]
-                    if not self._can_move_cards([last_card], [prev_card]):
-                        valid_moves.append(Move(from_idx, -1, 1, len(field_slot) - 1))
+                # only a top card that doesn't stack on the card below it
+                if len(field_slot) > 1 and self._run_lengths[from_idx] == 1:
+                    valid_moves.append(pack_move(from_idx, -1, 1, len(field_slot) - 1, -1, field_slot[-1].code, 0))
         return valid_moves
 
-    def _can_move_cards(self, cards: List[Card], to_slot: List[Card]) -> bool:
-        def is_decending_values(cards: List[Card]) -> bool:
-            values = [card.value for card in cards]
-            for i in range(0, len(values) - 1):
-                if values[i]-1 != values[i+1]:
-                    return False
-            return True
+    def select_moves(self, moves: List[int], forced: bool = True) -> List[int]:
+        """
+        the packed moves from the move generators worth branching on.
+        A move that completes a started run is forced: the slot never changes again and nothing stacks on a 6 or a
+        fourth face, so it is played alone as a macro step. Otherwise moves of the same cards into different
+        empty slots reach column permutations of one board, only the first of them is kept.
+        """
+        field_slots = self.field_slots
+        selected: List[int] = []
+        to_empty: Set[int] = set()
+        for packed in moves:
+            after = ((packed >> 15) & 15) - 1
+            if after < 0:
+                selected.append(packed)
+                continue
+            if not field_slots[after]:
+                # the before and num_cards bits
+                empty_key = (packed >> 12) & 0x787
+                if empty_key in to_empty:
+                    continue
+                to_empty.add(empty_key)
+            elif forced and move_score(packed) == SCORE_COMPLETES:
+                return [packed]
+            selected.append(packed)
+        return selected
+
+    def packed_moves(self, rules: bool = True, forced: bool = True, stats: Optional["SolverStats"] = None) -> List[int]:
+        """
+        the field and wildcard slot moves packed by pack_move, in generation order, as select_moves picks them if rules.
+        The moves generated and pruned are counted into stats if given
+        """
+        moves = self.packed_field_slot_moves()
+        num_field_moves = len(moves)
+        moves.extend(self.packed_wildcard_slot_moves())
+        num_moves = len(moves)
+        if rules:
+            moves = self.select_moves(moves, forced)
+        if stats is not None:
+            stats.field_moves += num_field_moves
+            stats.wildcard_moves += num_moves - num_field_moves
+            stats.pruned_moves += num_moves - len(moves)
+        return moves
 
-        def is_alternating_color(cards: List[Card]) -> bool:
-            if len(cards) == 1:
-                return True
-            reds = [card.is_red() for card in cards]
-            odd_reds = reds[::2] # should be of same color but opposite of even ones
-            even_reds = reds[1::2] # should be of same color
-            odd_reds_inv = [not red for red in odd_reds]
-            all_reds = odd_reds_inv + even_reds # should all be the same color
-            return all(red == all_reds[0] for red in all_reds)
+    def moves(self, ordering: Optional["MoveOrdering"] = None, rules: bool = True, forced: bool = True,
+              stats: Optional["SolverStats"] = None) -> Iterator[Move]:
+        """
+        packed_moves best first by ordering, or else in generation order. Not lazy: the moves are generated and ordered
+        up front as ints for the board as it is now, only the Move objects are made as they are drawn
+        """
+        moves = self.packed_moves(rules, forced, stats)
+        if ordering is not None:
+            ordering.order(moves)
+        for packed in moves:
+            yield unpack_move(packed)
 
+    def is_dead(self) -> bool:
+        """
+        certainly unsolvable: the wildcard card can never leave.
+        It could only go on top of a card it stacks on, or into an empty slot. With no empty slot, the first slot to
+        empty needs every card in it to move onto another card, so we find the cards that might ever move that way
+        and check whether any slot could clear or any card for the wildcard card could come free.
+        Cards that can't ever move bury each other in cycles as well as under complete slots.
+        """
+        wildcard_card = self.wildcard_slot.card
+        if wildcard_card is None:
+            return False
+        field_slots = self.field_slots
+        if not all(field_slots):
+            return False # an empty slot
+        done = self._done
+        tops = [field_slot[-1].code if not done[idx] else 0 for idx, field_slot in enumerate(field_slots)]
+        # cheap ways out: the wildcard card or a whole slot can move right now
+        if any([STACKS_ON[wildcard_card.code][code] for code in tops]):
+            return False
+        for idx, field_slot in enumerate(field_slots):
+            if not done[idx] and self._run_lengths[idx] == len(field_slot) \
+                and any([STACKS_ON[field_slot[0].code][code] for other_idx, code in enumerate(tops) if other_idx != idx]):
+                return False
+
+        positions: List[List[Tuple[int, int]]] = [[] for _ in CARDS]
+        for idx, field_slot in enumerate(field_slots):
+            if not done[idx]:
+                for card_idx, card in enumerate(field_slot):
+                    positions[card.code].append((idx, card_idx))
+        movable = [[False] * len(field_slot) for field_slot in field_slots]
+        # per slot, idx of the highest card not known to be movable, cards below it can't come free
+        highest_stuck = [-1 if done[idx] else len(field_slot) - 1 for idx, field_slot in enumerate(field_slots)]
+
+        def can_come_free(code: int, slot_idx: int, card_idx: int) -> bool:
+            # a card with this code could end up on top of a slot for the card at (slot_idx, card_idx) to go on
+            for target_slot_idx, target_idx in positions[code]:
+                if highest_stuck[target_slot_idx] > target_idx:
+                    continue
+                # a card above in the same slot has to move away first, one below stays buried
+                if target_slot_idx != slot_idx or (target_idx > card_idx and movable[target_slot_idx][target_idx]):
+                    return True
+            return False
+
+        changed = True
+        while changed:
+            changed = False
+            for idx, field_slot in enumerate(field_slots):
+                if done[idx]:
+                    continue
+                slot_movable = movable[idx]
+                for card_idx, card in enumerate(field_slot):
+                    if slot_movable[card_idx]:
+                        continue
+                    # moves along with the card below, or by itself
+                    if (card_idx > 0 and slot_movable[card_idx - 1] and STACKS_ON[card.code][field_slot[card_idx - 1].code]) \
+                        or any([can_come_free(code, idx, card_idx) for code in TARGETS[card.code]]):
+                        slot_movable[card_idx] = True
+                        changed = True
+                stuck_idx = len(field_slot) - 1
+                while stuck_idx >= 0 and slot_movable[stuck_idx]:
+                    stuck_idx -= 1
+                highest_stuck[idx] = stuck_idx
+
+        if any([highest_stuck[idx] < 0 and not done[idx] for idx in range(0, len(field_slots))]):
+            return False # a slot might clear
+        return not any([can_come_free(code, -1, -1) for code in TARGETS[wildcard_card.code]])
+
+    @staticmethod
+    def _completes_run(to_slot: List[Card], num_cards: int) -> bool:
+        # to_slot is one run, and legal moves extend it, so the length decides
+        num_cards += len(to_slot)
+        return num_cards == 4 if IS_FACE[to_slot[0].code] else (num_cards == 5 and to_slot[0].value == 10)
+
+    @staticmethod
+    def _stacks_on(card: Card, below: Card) -> bool:
+        return STACKS_ON[card.code][below.code]
+
+    @staticmethod
+    def _is_complete_run(cards: List[Card]) -> bool:
+        # 4 faces of one suit or 10 down to 6, assuming cards already form a run
+        return not cards or (len(cards) == 4 and IS_FACE[cards[0].code]) or (len(cards) == 5 and cards[0].value == 10)
+
+    def _can_move_cards(self, cards: List[Card], to_slot: List[Card]) -> bool:
         # cards must be (all faces && same suit) or (cards must be all values and decending value and alternating color)
-        if not \
-            ((all([card.is_face() for card in cards]) and all([card.suit == cards[0].suit for card in cards])) \
-            or ((all([not card.is_face() for card in cards]) and is_decending_values(cards) and is_alternating_color(cards)))):
+        if not self._is_run(cards):
             return False
 
         # empty slot can accept any card (stack)
-        if not to_slot: 
+        if not to_slot:
             return True
-        
-        to_card = to_slot[-1]
-        current_card = cards[0]
-        
-        if current_card.is_face() and to_card.is_face():
-            return to_card.suit == current_card.suit
-        elif not (current_card.is_face() or to_card.is_face()):
-            return (to_card.value == current_card.value + 1) and (current_card.is_red() != to_card.is_red())
-        else:
-            return False
+        return STACKS_ON[cards[0].code][to_slot[-1].code]
+
+    @staticmethod
+    def _is_run(cards: List[Card]) -> bool:
+        return all([STACKS_ON[cards[i].code][cards[i-1].code] for i in range(1, len(cards))])
 
     @staticmethod
     def _is_field_slot_done(cards: List[Card]) -> bool:
-        # empty slot
-        if not cards:
-            return True
-        # all face, same suit
-        if len(cards) == 4 and all([card.is_face() for card in cards]):
-            return all([card.suit == cards[0].suit for card in cards]) 
-        # ordered values, interleaving color
-        elif all([not card.is_face() for card in cards]):
-            values = [card.value for card in cards]
-            if values != [10, 9, 8, 7, 6]:
-                return False
+        # empty slot, all face same suit, or ordered values with interleaving color
+        return Gameboard._is_run(cards) and Gameboard._is_complete_run(cards)
+
+    def encode(self) -> bytes:
+        """
+        packed board state, one byte per card:
+        wildcard card code (0 if empty), then each field slot's card codes followed by a 0 separator
+        """
+        codes = [self.wildcard_slot.card.code if self.wildcard_slot.has_card() else 0]
+        for field_slot in self.field_slots:
+            codes.extend([card.code for card in field_slot])
+            codes.append(0)
+        return bytes(codes)
+
+    def canonical_order(self) -> List[int]:
+        """
+        field slot indices sorted by slot contents, slot i of the canonical board is slot canonical_order()[i] of this board
+        """
+        slot_keys = [bytes([card.code for card in field_slot]) for field_slot in self.field_slots]
+        return sorted(range(0, 9), key=lambda idx: slot_keys[idx])
+
+    def canonical_encode(self) -> bytes:
+        """
+        like encode(), but with the field slots sorted by contents, so all column permutations of a board share one key
+        """
+        slot_keys = sorted([bytes([card.code for card in field_slot]) for field_slot in self.field_slots])
+        wildcard_code = self.wildcard_slot.card.code if self.wildcard_slot.has_card() else 0
+        return bytes([wildcard_code]) + b"\0".join(slot_keys) + b"\0"
+
+    def canonical(self):
+        return Gameboard.decode(self.canonical_encode())
+
+    def copy(self) -> "Gameboard":
+        """
+        a board in the same position that can be played on without touching this one, cards are shared
+        """
+        return Gameboard(WildcardSlot(self.wildcard_slot.card), [list(field_slot) for field_slot in self.field_slots])
+
+    @staticmethod
+    def decode(source: bytes):
+        wildcard_slot = WildcardSlot(Card.from_code(source[0])) if source[0] else WildcardSlot()
+        field_slots: List[List[Card]] = [[]]
+        for code in source[1:-1]:
+            if code:
+                field_slots[-1].append(Card.from_code(code))
             else:
-                red_color = [card.is_red() for card in cards]
-                return (red_color == [True, False, True, False, True]) or (red_color == [False, True, False, True, False])
-        # mix of face and value
-        else:
-            return False
+                field_slots.append([])
+        return Gameboard(wildcard_slot=wildcard_slot, field_slots=field_slots)
 
     def __str__(self):
         return "|".join([str(self.wildcard_slot)] + [",".join([str(card) for card in field_slot]) for field_slot in self.field_slots])
 
+    @staticmethod
+    def deal(seed: int):
+        """
+        random valid deal: 4 face cards per suit, and a red and black pair (H, D, S, C) of each value 6 to 10,
+        shuffled into 9 slots of 4 with an empty wildcard slot. The same seed always gives the same deal.
+        """
+        cards = [Card.from_str(f"0{suit.value}") for suit in Suit for _ in range(0, 4)] \
+            + [Card.from_str(f"{value}{suit.value}") for value in range(6, 11) for suit in Suit]
+        random.Random(seed).shuffle(cards)
+        return Gameboard(wildcard_slot=WildcardSlot(), field_slots=[cards[i:i+4] for i in range(0, 36, 4)])
+
     @staticmethod
     def from_str(source: str):
         source = source.upper()
@@ -285,58 +642,882 @@ class Gameboard:
             all_str = "_" + all_str
             return Gameboard.from_str(all_str)
 
+@dataclass
+class SolverStats:
+    """
+    counters of the last solve() call.
+    The time split is estimated from every TIMING_SAMPLE_INTERVAL-th node and move only, to keep clock reads out of the hot loop.
+    """
+    nodes_expanded: int = 0
+    moves_tried: int = 0
+    visited_hits: int = 0
+    current_depth: int = 0
+    depth_histogram: List[int] = field(default_factory=list) # nodes expanded per depth
+    field_moves: int = 0 # moves generated, by type
+    wildcard_moves: int = 0
+    pruned_moves: int = 0 # generated moves dropped by Gameboard.select_moves
+    dead_ends: int = 0 # nodes cut off by Gameboard.is_dead
+    bounded: int = 0 # boards cut off because their lower bound runs past the depth limit
+    elapsed: float = 0.0
+    # timing samples: summed seconds and number of samples
+    sampled_nodes: int = 0
+    sampled_move_generation: float = 0.0
+    sampled_moves: int = 0
+    sampled_execute: float = 0.0
+    sampled_hashing: float = 0.0
+    sampled_undos: int = 0
+    sampled_undo: float = 0.0
+
+    TIMING_SAMPLE_INTERVAL = 64
+
+    @property
+    def branching_factor(self) -> float:
+        # moves searched per expanded node
+        return (self.field_moves + self.wildcard_moves - self.pruned_moves) / self.nodes_expanded if self.nodes_expanded else 0.0
+
+    @property
+    def max_depth(self) -> int:
+        depths = [depth for depth, count in enumerate(self.depth_histogram) if count]
+        return depths[-1] if depths else 0
+
+    def estimated_times(self) -> Dict[str, Optional[float]]:
+        """
+        seconds spent per phase, extrapolated from the samples
+        """
+        def extrapolate(sampled: float, samples: int, total: int) -> Optional[float]:
+            return sampled / samples * total if samples else None
+
+        return {
+            "move_generation": extrapolate(self.sampled_move_generation, self.sampled_nodes, self.nodes_expanded),
+            "execute": extrapolate(self.sampled_execute, self.sampled_moves, self.moves_tried),
+            "undo": extrapolate(self.sampled_undo, self.sampled_undos, self.moves_tried),
+            "hashing": extrapolate(self.sampled_hashing, self.sampled_moves, self.moves_tried),
+        }
+
+    def report(self) -> str:
+        nodes_per_second = self.nodes_expanded / self.elapsed if self.elapsed > 0 else 0
+        lines = [
+            f"{self.nodes_expanded} nodes expanded in {self.elapsed:.3f}s ({nodes_per_second:.0f} nodes/s), "
+            f"{self.moves_tried} moves tried, {self.visited_hits} visited hits, max depth {self.max_depth}, current depth {self.current_depth}",
+            f"moves generated: {self.field_moves} field, {self.wildcard_moves} wildcard, {self.pruned_moves} pruned, "
+            f"branching factor {self.branching_factor:.2f}, {self.dead_ends} dead ends, {self.bounded} over the lower bound",
+        ]
+        times = self.estimated_times()
+        if all([seconds is not None for seconds in times.values()]):
+            lines.append("estimated time: " + ", ".join([f"{phase} {seconds:.3f}s" for phase, seconds in times.items()]))
+        lines.append("depth histogram: " + " ".join([f"{depth}:{count}" for depth, count in enumerate(self.depth_histogram) if count]))
+        return "\n".join(lines)
+
+class CancellationToken:
+    """
+    lets another thread stop a running search, the solver notices it at its next budget check
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+@dataclass
+class SolveBudget:
+    time_limit: Optional[float] = None # seconds
+    max_nodes: Optional[int] = None
+    max_memory: Optional[int] = None # bytes, estimated size of the visited states
+    cancellation: Optional[CancellationToken] = None
+
+    def exceeded(self, stats: SolverStats, memory: int = 0) -> Optional[str]:
+        """
+        name of the limit that ran out, None while within budget
+        """
+        if self.cancellation is not None and self.cancellation.is_cancelled():
+            return "cancelled"
+        if self.time_limit is not None and stats.elapsed >= self.time_limit:
+            return "time"
+        if self.max_nodes is not None and stats.nodes_expanded >= self.max_nodes:
+            return "nodes"
+        if self.max_memory is not None and memory >= self.max_memory:
+            return "memory"
+        return None
+
+    def nodes_left(self, stats: SolverStats, default: int) -> int:
+        return default if self.max_nodes is None else min(default, self.max_nodes - stats.nodes_expanded)
+
+@unique
+class SolveStatus(Enum):
+    SOLVED = "solved"
+    UNSOLVABLE = "unsolvable" # everything within the solver's search limits was tried
+    GAVE_UP = "gave_up" # the budget ran out first
+
+@dataclass
+class SolveResult:
+    status: SolveStatus
+    moves: List[Move]
+    stats: SolverStats
+    reason: Optional[str] = None # which budget limit ran out for GAVE_UP, "pruned" by an incomplete search, or "error"
+
 class NacbracSolver(ABC):
+    def __init__(self):
+        self.stats = SolverStats()
+        # called with the stats every so many nodes while solving, if the solver supports it
+        self.on_progress: Optional[Callable[[SolverStats], None]] = None
+
     @abstractmethod
     def solve(self, gameboard: Gameboard) -> List[Move]:
         pass
 
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        """
+        solve within budget. Solvers that can't stop early run to completion, overriding this is how they learn to.
+        Every solver leaves gameboard as it was, whatever the outcome.
+        """
+        moves = self.solve(gameboard)
+        return SolveResult(SolveStatus.SOLVED if moves else SolveStatus.UNSOLVABLE, moves, self.stats)
+
+class TranspositionTable:
+    """
+    table of the board hashes a search reached, and the depth it reached each one at. It starts at 2^initial_bits
+    buckets and doubles whenever half full or a bucket overflows, up to 2^bits buckets; from there on it evicts.
+    A board whose search ran into the depth limit is searched again when it comes up shallower, with more moves
+    left below it; once a board's search finished without hitting the limit it is never searched again.
+    Buckets hold two entries: one keeps the shallowest board that hashed there, the other the latest.
+    """
+    # visit() results
+    NEW = 0
+    SEEN = 1
+    SEEN_CUT_OFF = 2 # seen, and its search ran into the depth limit
+
+    # deepest depth the table can record
+    MAX_DEPTH = 0xffff
+
+    def __init__(self, bits: int = 18, initial_bits: int = 10):
+        self.max_buckets = 1 << bits
+        self._allocate(1 << min(initial_bits, bits))
+        self.entries = 0
+        self.stored = 0 # boards recorded the first time (as far as the table still knows)
+        self.reopened = 0 # boards searched again from a shallower depth
+        self.evicted = 0
+
+    def visit(self, key: int, depth: int) -> int:
+        """
+        SEEN or SEEN_CUT_OFF if there is no need to search key from depth, otherwise records it at depth and returns NEW
+        """
+        key = key or 1
+        keys = self._keys
+        depths = self._depths
+        cut_offs = self._cut_offs
+        idx = (key & self._mask) << 1
+        for entry in (idx, idx + 1):
+            if keys[entry] == key:
+                if depths[entry] <= depth:
+                    return self.SEEN_CUT_OFF if cut_offs[entry] else self.SEEN
+                depths[entry] = depth
+                cut_offs[entry] = 0
+                self.reopened += 1
+                return self.NEW
+
+        self.stored += 1
+        # grow rather than evict
+        while self.num_buckets < self.max_buckets and (keys[idx + 1] or self.entries >= self.num_buckets):
+            self._grow()
+            keys = self._keys
+            depths = self._depths
+            cut_offs = self._cut_offs
+            idx = (key & self._mask) << 1
+        if keys[idx + 1]:
+            self.evicted += 1
+        else:
+            self.entries += 1
+        if not keys[idx] or depth <= depths[idx]:
+            # the shallower board takes the first entry, the previous one moves to the second
+            keys[idx + 1] = keys[idx]
+            depths[idx + 1] = depths[idx]
+            cut_offs[idx + 1] = cut_offs[idx]
+            keys[idx] = key
+            depths[idx] = depth
+            cut_offs[idx] = 0
+        else:
+            keys[idx + 1] = key
+            depths[idx + 1] = depth
+            cut_offs[idx + 1] = 0
+        return self.NEW
+
+    def finish(self, key: int, cut_off: bool) -> None:
+        """
+        key's search is over, cut_off if it ran into the depth limit
+        """
+        key = key or 1
+        idx = (key & self._mask) << 1
+        for entry in (idx, idx + 1):
+            if self._keys[entry] == key:
+                if cut_off:
+                    self._cut_offs[entry] = 1
+                else:
+                    self._depths[entry] = 0
+                    self._cut_offs[entry] = 0
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def memory(self) -> int:
+        return sum([table.itemsize * len(table) for table in (self._keys, self._depths, self._cut_offs)])
+
+    def _allocate(self, num_buckets: int) -> None:
+        self.num_buckets = num_buckets
+        self._mask = num_buckets - 1
+        # key 0 marks an empty entry. Depth 0 is a board searched to the end
+        self._keys = array("Q", [0]) * (2 * num_buckets)
+        self._depths = array("H", [0]) * (2 * num_buckets)
+        # 1 where the board's search finished but hit the depth limit somewhere below
+        self._cut_offs = array("B", [0]) * (2 * num_buckets)
+
+    def _grow(self) -> None:
+        # a bucket's entries split between two buckets of the doubled table, in their order, so none is lost
+        keys, depths, cut_offs = self._keys, self._depths, self._cut_offs
+        self._allocate(2 * self.num_buckets)
+        new_keys, new_depths, new_cut_offs, mask = self._keys, self._depths, self._cut_offs, self._mask
+        for entry, key in enumerate(keys):
+            if key:
+                idx = (key & mask) << 1
+                if new_keys[idx]:
+                    idx += 1
+                new_keys[idx] = key
+                new_depths[idx] = depths[entry]
+                new_cut_offs[idx] = cut_offs[entry]
+
+class MoveOrdering:
+    """
+    the order a DfsSearch tries the moves of a board in: by the static score of the move generator, best first
+    """
+    def order(self, moves: List[int]) -> None:
+        # stable, moves of the same score stay in generation order
+        moves.sort(key=move_score, reverse=True)
+
+    def failed(self, move: int, nodes: int) -> None:
+        """
+        the search below move ran out of moves after expanding nodes boards
+        """
+
+class HistoryOrdering(MoveOrdering):
+    """
+    learns which cards are bad to move: whenever the search below a move runs out of moves, the nodes it expanded
+    are charged to the moved card, and moves of the cards charged least go first. Moves completing a slot still
+    go first and the static score breaks ties.
+    """
+    def __init__(self):
+        # nodes charged per card code
+        self.history: List[int] = [0] * MAX_CARD_CODE
+
+    def order(self, moves: List[int]) -> None:
+        history = self.history
+
+        def key(packed: int) -> Tuple[bool, int, int]:
+            score = packed >> MOVE_SCORE_SHIFT
+            return score == SCORE_COMPLETES, -history[(packed >> MOVE_CARD_SHIFT) & 63], score
+        moves.sort(key=key, reverse=True)
+
+    def failed(self, move: int, nodes: int) -> None:
+        self.history[moved_card_code(move)] += nodes
+
+class DfsSearch:
+    """
+    depth first search with an explicit stack, so it can be suspended after some nodes and resumed later.
+    The gameboard is left mid-search while suspended and must not be touched until the search finishes.
+    """
+    def __init__(self, gameboard: Gameboard, max_depth: int = 55, rules: bool = True, dead_checks: bool = False,
+                 table_bits: int = 18, lower_bound: Optional[Callable[[Gameboard], int]] = None,
+                 ordering: Optional[MoveOrdering] = None):
+        if not 0 <= max_depth < TranspositionTable.MAX_DEPTH:
+            raise ValueError(f"max_depth must be from 0 to {TranspositionTable.MAX_DEPTH - 1}")
+        self.gameboard = gameboard
+        self.max_depth = max_depth
+        # admissible estimate of the moves a board still needs, boards that can't make it within max_depth are cut off
+        self.lower_bound = lower_bound
+        # prune with Gameboard.select_moves
+        self.rules = rules
+        # the order moves are tried in, generation order if None
+        self.ordering = ordering
+        # stop at boards Gameboard.is_dead rejects. Off by default: 9% of the nodes on the bench corpus are dead,
+        # but they sit near the leaves, so it saves only 1.7% of the nodes at half the nodes/s
+        self.dead_checks = dead_checks
+        self.visited = TranspositionTable(table_bits)
+        self.visited.visit(gameboard.zobrist, 0)
+        # when set to a list, the hashes of newly visited boards are also appended here, for sharing with other searchers
+        self.journal: Optional[List[int]] = None
+        self.stats = SolverStats(depth_histogram=[0] * (max_depth + 1))
+        self.solution: Optional[List[Move]] = None
+        self.finished = False
+        # per depth buffers, reused for every node at that depth:
+        # candidate moves packed by pack_move, index of the next move to try, and the move taken
+        self._moves: List[List[int]] = [[] for _ in range(0, max_depth + 1)]
+        self._next: List[int] = [0] * (max_depth + 1)
+        self._path: List[Move] = [None] * (max_depth + 1)
+        # whether the search below the board at that depth ran into max_depth so far
+        self._cut_off: List[bool] = [False] * (max_depth + 1)
+        # nodes_expanded when the board at that depth was expanded, for the size of its subtree
+        self._expanded_at: List[int] = [0] * (max_depth + 1)
+        self._depth = 0
+        self._root_key = gameboard.encode()
+        self._expand(0)
+
+    @property
+    def nodes_expanded(self) -> int:
+        return self.stats.nodes_expanded
+
+    def visited_memory(self) -> int:
+        return self.visited.memory()
+
+    def _expand(self, depth: int) -> None:
+        stats = self.stats
+        stats.nodes_expanded += 1
+        stats.depth_histogram[depth] += 1
+        sample = not stats.nodes_expanded % SolverStats.TIMING_SAMPLE_INTERVAL
+        if sample:
+            starttime = time.perf_counter()
+        moves = self._moves[depth]
+        self._next[depth] = 0
+        self._expanded_at[depth] = stats.nodes_expanded
+        self._cut_off[depth] = False
+        if self.dead_checks and self.gameboard.is_dead():
+            stats.dead_ends += 1
+            moves.clear()
+            return
+        moves[:] = self.gameboard.packed_moves(self.rules, stats=stats)
+        if self.ordering is not None:
+            self.ordering.order(moves)
+        if sample:
+            stats.sampled_move_generation += time.perf_counter() - starttime
+            stats.sampled_nodes += 1
+
+    def run(self, max_nodes: Optional[int] = None) -> bool:
+        """
+        search until solved, exhausted, or max_nodes more nodes were expanded
+        returns True once the search is finished, False if it was suspended
+        """
+        if self.finished:
+            return True
+        gameboard = self.gameboard
+        visited = self.visited
+        journal = self.journal
+        lower_bound = self.lower_bound
+        ordering = self.ordering
+        stats = self.stats
+        stop_at = stats.nodes_expanded + max_nodes if max_nodes is not None else -1
+        depth = self._depth
+        moves_tried = stats.moves_tried
+        visited_hits = stats.visited_hits
+
+        while depth >= 0:
+            moves = self._moves[depth]
+            idx = self._next[depth]
+            if idx == len(moves):
+                # all moves tried, revert the move that led here
+                visited.finish(gameboard.zobrist, self._cut_off[depth])
+                depth -= 1
+                if depth >= 0:
+                    self._cut_off[depth] |= self._cut_off[depth + 1]
+                    gameboard.undo(self._path[depth])
+                    if ordering is not None:
+                        ordering.failed(self._moves[depth][self._next[depth] - 1], stats.nodes_expanded - self._expanded_at[depth + 1] + 1)
+                continue
+
+            move = unpack_move(moves[idx])
+            self._next[depth] = idx + 1
+            moves_tried += 1
+            # slots are interchangeable, so permuted boards share a hash; moves are still made on the real board
+            sample = not moves_tried % SolverStats.TIMING_SAMPLE_INTERVAL
+            if sample:
+                starttime = time.perf_counter()
+                gameboard.execute(move)
+                executed = time.perf_counter()
+                seen = visited.visit(gameboard.zobrist, depth + 1)
+                stats.sampled_execute += executed - starttime
+                stats.sampled_hashing += time.perf_counter() - executed
+                stats.sampled_moves += 1
+            else:
+                gameboard.execute(move)
+                seen = visited.visit(gameboard.zobrist, depth + 1)
+            if seen:
+                visited_hits += 1
+                if seen == TranspositionTable.SEEN_CUT_OFF:
+                    self._cut_off[depth] = True
+                if sample:
+                    starttime = time.perf_counter()
+                    gameboard.undo(move)
+                    stats.sampled_undo += time.perf_counter() - starttime
+                    stats.sampled_undos += 1
+                else:
+                    gameboard.undo(move)
+                continue
+            if journal is not None:
+                journal.append(gameboard.zobrist)
+            self._path[depth] = move
+
+            if gameboard.solved():
+                self.solution = self._path[:depth + 1]
+                self.finished = True
+                break
+            if depth == self.max_depth or (lower_bound is not None and depth + lower_bound(gameboard) > self.max_depth):
+                if depth < self.max_depth:
+                    stats.bounded += 1
+                # left unsearched because of the depth limit, so searched again when it comes up shallower
+                visited.finish(gameboard.zobrist, True)
+                self._cut_off[depth] = True
+                gameboard.undo(move)
+                continue
+
+            depth += 1
+            self._expand(depth)
+            if stats.nodes_expanded == stop_at:
+                break
+
+        self._depth = depth
+        stats.current_depth = max(depth, 0)
+        stats.moves_tried = moves_tried
+        stats.visited_hits = visited_hits
+        if depth < 0:
+            self.finished = True
+        return self.finished
+
+    def abandon(self) -> None:
+        """
+        stop a suspended search for good, undoing its moves so the gameboard is back at the root.
+        It doesn't count as finished, and must not be run again.
+        """
+        for depth in range(self._depth - 1, -1, -1):
+            self.gameboard.undo(self._path[depth])
+        self._depth = 0
+        self._next[0] = len(self._moves[0])
+
+    def split(self) -> List[Tuple[List[Move], bytes]]:
+        """
+        give away half of the untried moves at the shallowest depth that has any, for another searcher to explore
+        returns (moves from the root, encoded board) per subtree, only valid while the search is suspended
+        """
+        for depth in range(0, self._depth + 1):
+            moves = self._moves[depth]
+            num_untried = len(moves) - self._next[depth]
+            if num_untried > 1 or (num_untried == 1 and depth < self._depth):
+                num_given = max(num_untried // 2, 1)
+                given = moves[len(moves) - num_given:]
+                del moves[len(moves) - num_given:]
+                prefix = self._path[:depth]
+                board = Gameboard.decode(self._root_key)
+                for move in prefix:
+                    board.execute(move)
+                subtrees = []
+                for move in map(unpack_move, given):
+                    board.execute(move)
+                    subtrees.append((prefix + [move], board.encode()))
+                    board.undo(move)
+                return subtrees
+        return []
+
 class DfsSolver(NacbracSolver):
+    # nodes searched between budget checks and progress callbacks
+    PROGRESS_INTERVAL = 1000
+
+    def __init__(self, max_depth: int = 55, rules: bool = True, dead_checks: bool = False, table_bits: int = 18,
+                 lower_bound: Optional[Callable[[Gameboard], int]] = None, ordering: Optional[Callable[[], MoveOrdering]] = MoveOrdering):
+        super().__init__()
+        self.max_depth = max_depth
+        self.rules = rules
+        self.dead_checks = dead_checks
+        # transposition table size limit, 2^table_bits buckets of 22 bytes; tables start small and grow with the search
+        self.table_bits = table_bits
+        self.lower_bound = lower_bound
+        # makes a fresh MoveOrdering per search, generation order if None
+        self.ordering = ordering
+        # the visited boards of the last search
+        self.visited: Optional[TranspositionTable] = None
+
+    def start(self, gameboard: Gameboard) -> DfsSearch:
+        """
+        begin a search that the caller drives with DfsSearch.run(max_nodes), e.g. to time-slice solving
+        """
+        if not gameboard.validate():
+            raise ValueError("Invalid gameboard!")
+        return DfsSearch(gameboard, self.max_depth, self.rules, self.dead_checks, self.table_bits, self.lower_bound,
+                         self.ordering() if self.ordering is not None else None)
+
     def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        budget = budget or SolveBudget()
+        # the search plays on its board, and stops on it when solved
+        search = self.start(gameboard.copy())
+        self.visited = search.visited
+        self.stats = search.stats
+        starttime = time.perf_counter()
+        while True:
+            self.stats.elapsed = time.perf_counter() - starttime
+            reason = budget.exceeded(self.stats, search.visited_memory())
+            if reason is not None:
+                search.abandon()
+                return SolveResult(SolveStatus.GAVE_UP, [], self.stats, reason)
+            if search.run(budget.nodes_left(self.stats, self.PROGRESS_INTERVAL)):
+                break
+            if self.on_progress is not None:
+                self.on_progress(self.stats)
+        self.stats.elapsed = time.perf_counter() - starttime
+        if search.solution is None:
+            return SolveResult(SolveStatus.UNSOLVABLE, [], self.stats)
+        return SolveResult(SolveStatus.SOLVED, search.solution, self.stats)
+
+class AStarSolver(NacbracSolver):
+    """
+    weighted A* over canonical board states, f = moves so far + weight * heuristic
+    the heuristic is not admissible, so solutions are short but not guaranteed optimal
+    """
+    def __init__(self, weight: float = 2.0):
+        super().__init__()
+        self.weight = weight
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
         if not gameboard.validate():
             raise ValueError("Invalid gameboard!")
 
-        self.hashes: Set = set()
-        self.gameboard = gameboard
-        self.last_update = datetime.datetime.now()
-        depth = 0
-        return self._solve(depth)
-
-    def _solve(self, depth: int) -> List[Move]:
-        # dfs
-        if depth > 55:
-            return []
-
-        now = datetime.datetime.now()
-        if now > self.last_update + datetime.timedelta(seconds=60):
-            self.last_update = now
-            print(len(self.hashes))
-
-        def try_moves(moves: List[Move]) -> List[Move]:
-            for move in field_slot_moves:
-                self.gameboard.execute(move)
-                new_gameboard_hash = (str(self.gameboard))
-                if new_gameboard_hash not in self.hashes: # consider this new position
-                    self.hashes.add(new_gameboard_hash)
-                    if self.gameboard.solved():
-                        return [move]
-                    else:
-                        solution_moves = self._solve(depth + 1)
-                        if solution_moves:
-                            return [move] + solution_moves
-                # not a good move, revert
-                self.gameboard.undo(move)
-            return []
-        
-        field_slot_moves = self.gameboard.get_field_slot_moves()
-        solution = try_moves(field_slot_moves)
-
-        if solution:
-            return solution
-        
-        wildcard_slot_moves = self.gameboard.get_wildcard_slot_moves()
-        return try_moves(wildcard_slot_moves)
+        budget = budget or SolveBudget()
+        stats = self.stats = SolverStats()
+        starttime = time.perf_counter()
+        start_key = gameboard.encode()
+        came_from: Dict[bytes, Tuple[bytes, Move]] = {} # board key -> (previous board key, move)
+        best_costs: Dict[bytes, int] = {gameboard.canonical_encode(): 0}
+        tie_breaker = itertools.count()
+        frontier = [(self.weight * self.heuristic(gameboard), next(tie_breaker), 0, start_key)]
+
+        while frontier:
+            _, _, cost, key = heapq.heappop(frontier)
+            board = Gameboard.decode(key)
+            if cost > best_costs[board.canonical_encode()]:
+                continue # reached again through a shorter path after being queued
+            if board.solved():
+                stats.elapsed = time.perf_counter() - starttime
+                return SolveResult(SolveStatus.SOLVED, self._reconstruct(came_from, start_key, key), stats)
+
+            if not stats.nodes_expanded % DfsSolver.PROGRESS_INTERVAL:
+                stats.elapsed = time.perf_counter() - starttime
+                # dict tables plus keys, every key is about as long as the start board's
+                memory = sys.getsizeof(best_costs) + sys.getsizeof(came_from) + (len(best_costs) + 2 * len(came_from)) * sys.getsizeof(start_key)
+                reason = budget.exceeded(stats, memory)
+                if reason is not None:
+                    return SolveResult(SolveStatus.GAVE_UP, [], stats, reason)
+                if self.on_progress is not None and stats.nodes_expanded:
+                    self.on_progress(stats)
+            stats.nodes_expanded += 1
+            if cost >= len(stats.depth_histogram):
+                stats.depth_histogram.extend([0] * (cost + 1 - len(stats.depth_histogram)))
+            stats.depth_histogram[cost] += 1
+            stats.current_depth = cost
+            # forced moves go through the heuristic like any other, playing them first cost 9x the nodes over the bench corpus
+            for move in board.moves(forced=False, stats=stats):
+                stats.moves_tried += 1
+                board.execute(move)
+                canonical_key = board.canonical_encode()
+                if cost + 1 >= best_costs.get(canonical_key, cost + 2):
+                    stats.visited_hits += 1
+                else:
+                    best_costs[canonical_key] = cost + 1
+                    next_key = board.encode()
+                    came_from[next_key] = (key, move)
+                    priority = cost + 1 + self.weight * self.heuristic(board)
+                    heapq.heappush(frontier, (priority, next(tie_breaker), cost + 1, next_key))
+                board.undo(move)
+        stats.elapsed = time.perf_counter() - starttime
+        return SolveResult(SolveStatus.UNSOLVABLE, [], stats)
+
+    @staticmethod
+    def heuristic(gameboard: Gameboard) -> int:
+        # unfinished slots + cards sitting on a card they can't be stacked on + occupied wildcard slot
+        score = 1 if gameboard.wildcard_slot.has_card() else 0
+        for idx, field_slot in enumerate(gameboard.field_slots):
+            if gameboard._done[idx]:
+                continue
+            score += 1
+            for i in range(1, len(field_slot)):
+                if not Gameboard._stacks_on(field_slot[i], field_slot[i-1]):
+                    score += 1
+        return score
+
+    @staticmethod
+    def _reconstruct(came_from: Dict[bytes, Tuple[bytes, Move]], start_key: bytes, key: bytes) -> List[Move]:
+        solution: List[Move] = []
+        while key != start_key:
+            key, move = came_from[key]
+            solution.append(move)
+        solution.reverse()
+        return solution
+
+class BloomFilter:
+    """
+    bit set over a (possibly shared memory) byte buffer, may report false positives but no false negatives
+    """
+    NUM_HASHES = 4
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.num_bits = len(buffer) * 8
+
+    def _bits(self, key: int) -> List[int]:
+        # keys are 64-bit Zobrist hashes, already random enough to split in two
+        h1 = key & 0xffffffff
+        h2 = (key >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(0, self.NUM_HASHES)]
+
+    def add(self, key: int) -> None:
+        for bit in self._bits(key):
+            self.buffer[bit >> 3] |= 1 << (bit & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all([self.buffer[bit >> 3] & (1 << (bit & 7)) for bit in self._bits(key)])
+
+def _parallel_solver_worker(tasks, solutions, stop, shutdown, generation, pending, idle, busy, nodes, bloom_buffer,
+                            max_depth: int, slice_nodes: int) -> None:
+    """
+    process pool worker for ParallelSolver, searches subtrees from the task queue and donates work to idle workers.
+    Tasks and solutions carry the generation of the search they belong to, the ones of a finished search are dropped.
+    """
+    bloom = BloomFilter(bloom_buffer)
+    is_idle = False
+    while not shutdown.is_set():
+        try:
+            task_generation, prefix, key = tasks.get(timeout=0.05)
+        except queue.Empty:
+            if not is_idle:
+                is_idle = True
+                with idle.get_lock():
+                    idle.value += 1
+            continue
+        if is_idle:
+            is_idle = False
+            with idle.get_lock():
+                idle.value -= 1
+        # counted busy before checking the task, so a new search never waits on a worker that could still take it
+        with busy.get_lock():
+            busy.value += 1
+        try:
+            if not stop.is_set() and task_generation == generation.value:
+                _parallel_solver_task(task_generation, prefix, key, tasks, solutions, stop, generation, pending, idle, nodes,
+                                      bloom, max_depth, slice_nodes)
+        finally:
+            with busy.get_lock():
+                busy.value -= 1
+
+def _parallel_solver_task(task_generation: int, prefix: List[Move], key: bytes, tasks, solutions, stop, generation, pending,
+                          idle, nodes, bloom: BloomFilter, max_depth: int, slice_nodes: int) -> None:
+    """
+    search one subtree for _parallel_solver_worker, until it is done or the search is stopped.
+    The shared state is only touched while task_generation is still the running search, so a worker that outlived
+    ParallelSolver._wait_idle() doesn't count towards, or stop, the next search
+    """
+    gameboard = Gameboard.decode(key)
+    # another worker already reached this board
+    if gameboard.zobrist not in bloom and generation.value == task_generation:
+        bloom.add(gameboard.zobrist)
+        search = DfsSearch(gameboard, max_depth - len(prefix), ordering=MoveOrdering())
+        search.journal = []
+        counted_nodes = 0
+        while not search.run(slice_nodes):
+            if stop.is_set() or generation.value != task_generation:
+                return
+            with nodes.get_lock():
+                if generation.value == task_generation:
+                    nodes.value += search.nodes_expanded - counted_nodes
+            counted_nodes = search.nodes_expanded
+            # publish the boards this worker visited since the last slice
+            for visited_key in search.journal:
+                bloom.add(visited_key)
+            search.journal.clear()
+            if idle.value > 0 and tasks.empty():
+                subtrees = [(task_generation, prefix + moves, subtree_key) for moves, subtree_key in search.split()]
+                with pending.get_lock():
+                    if generation.value != task_generation:
+                        return
+                    pending.value += len(subtrees)
+                for subtree in subtrees:
+                    tasks.put(subtree)
+        with nodes.get_lock():
+            if generation.value != task_generation:
+                return
+            nodes.value += search.nodes_expanded - counted_nodes
+        if search.solution is not None:
+            solutions.put((task_generation, prefix + search.solution))
+            stop.set()
+    with pending.get_lock():
+        if generation.value == task_generation:
+            pending.value -= 1
+
+class ParallelSolver(NacbracSolver):
+    """
+    DFS over a process pool: the first split_depth plies are expanded here, the subtrees go to a shared task queue,
+    and busy workers hand half of their shallowest untried moves to the queue whenever another worker is idle.
+    The worker processes are started by the first search and kept for the next ones until close().
+    Workers share visited boards through a Bloom filter in shared memory that doesn't know the depth a board was
+    reached at, so a false positive, or a board reached deeper first, can prune the only solution within max_depth.
+    The search is incomplete: running out of boards gives up with reason "pruned", which is no proof that the
+    board has no solution.
+    Budgets are checked by the parent every 50ms; the memory limit isn't supported.
+    """
+    def __init__(self, processes: Optional[int] = None, split_depth: int = 2, max_depth: int = 55,
+                 slice_nodes: int = 2000, bloom_bytes: int = 1 << 22):
+        super().__init__()
+        self.processes = processes or multiprocessing.cpu_count()
+        self.split_depth = split_depth
+        self.max_depth = max_depth
+        self.slice_nodes = slice_nodes
+        self.bloom_bytes = bloom_bytes
+        self._workers: List[multiprocessing.Process] = []
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        if not gameboard.validate():
+            raise ValueError("Invalid gameboard!")
+
+        budget = budget or SolveBudget()
+        self.stats = SolverStats()
+        starttime = time.perf_counter()
+        subtrees = self._split(gameboard)
+        if not subtrees or isinstance(subtrees[0], Move):
+            # no moves at all, or solved while splitting
+            self.stats.elapsed = time.perf_counter() - starttime
+            return SolveResult(SolveStatus.SOLVED if subtrees else SolveStatus.UNSOLVABLE, subtrees, self.stats)
+
+        if not self._start_workers():
+            # the workers let go of the previous search before its shared state is reset
+            self._wait_idle()
+        # under the counters' locks, so a worker still on the previous search sees either its own generation and
+        # counters or the new ones
+        with self._pending.get_lock(), self._nodes.get_lock():
+            with self._generation.get_lock():
+                self._generation.value += 1
+                generation = self._generation.value
+            self._pending.value = len(subtrees)
+            self._nodes.value = 0
+        ctypes.memset(self._bloom_buffer, 0, self.bloom_bytes)
+        self._stop.clear()
+        for prefix, key in subtrees:
+            self._tasks.put((generation, prefix, key))
+
+        split_nodes = self.stats.nodes_expanded
+        result = SolveResult(SolveStatus.GAVE_UP, [], self.stats, "pruned")
+        try:
+            while True:
+                try:
+                    solution_generation, solution = self._solutions.get(timeout=0.05)
+                    if solution_generation == generation:
+                        result = SolveResult(SolveStatus.SOLVED, solution, self.stats)
+                        break
+                except queue.Empty:
+                    if not all([worker.is_alive() for worker in self._workers]):
+                        # the crashed worker's subtrees are lost, the next search starts new workers
+                        result = SolveResult(SolveStatus.GAVE_UP, [], self.stats, "error")
+                        break
+                    if self._pending.value == 0:
+                        break
+                    self.stats.elapsed = time.perf_counter() - starttime
+                    self.stats.nodes_expanded = split_nodes + self._nodes.value
+                    reason = budget.exceeded(self.stats)
+                    if reason is not None:
+                        result = SolveResult(SolveStatus.GAVE_UP, [], self.stats, reason)
+                        break
+        finally:
+            self._stop.set()
+        self.stats.nodes_expanded = split_nodes + self._nodes.value
+        self.stats.elapsed = time.perf_counter() - starttime
+        return result
+
+    def close(self) -> None:
+        """
+        stop the worker processes, a later search starts new ones
+        """
+        if not self._workers:
+            return
+        self._stop.set()
+        self._shutdown.set()
+        for worker in self._workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
+
+    def __enter__(self) -> "ParallelSolver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_workers(self) -> bool:
+        """
+        True if new workers were started, False if the running ones are kept
+        """
+        if self._workers and all([worker.is_alive() for worker in self._workers]):
+            return False
+        self.close()
+        context = multiprocessing.get_context()
+        self._tasks = context.Queue()
+        self._solutions = context.Queue()
+        self._stop = context.Event()
+        self._stop.set()
+        self._shutdown = context.Event()
+        self._generation = context.Value("i", 0)
+        self._pending = context.Value("i", 0)
+        self._idle = context.Value("i", 0)
+        self._busy = context.Value("i", 0)
+        self._nodes = context.Value("q", 0)
+        self._bloom_buffer = context.RawArray("B", self.bloom_bytes)
+        self._workers = [context.Process(target=_parallel_solver_worker, daemon=True,
+                                         args=(self._tasks, self._solutions, self._stop, self._shutdown, self._generation,
+                                               self._pending, self._idle, self._busy, self._nodes, self._bloom_buffer,
+                                               self.max_depth, self.slice_nodes))
+                         for _ in range(0, self.processes)]
+        for worker in self._workers:
+            worker.start()
+        return True
+
+    def _wait_idle(self, timeout: float = 5.0) -> None:
+        # each worker notices the stop after its current slice, tasks of the stopped search are dropped unsearched
+        deadline = time.perf_counter() + timeout
+        while self._busy.value and time.perf_counter() < deadline:
+            time.sleep(0.005)
+
+    def _split(self, gameboard: Gameboard) -> Union[List[Move], List[Tuple[List[Move], bytes]]]:
+        """
+        breadth first expansion of the first split_depth plies, returns a solution if one is found on the way
+        """
+        frontier: List[Tuple[List[Move], bytes]] = [([], gameboard.encode())]
+        seen = {gameboard.canonical_encode()}
+        for _ in range(0, self.split_depth):
+            next_frontier: List[Tuple[List[Move], bytes]] = []
+            for prefix, key in frontier:
+                board = Gameboard.decode(key)
+                self.stats.nodes_expanded += 1
+                for move in board.moves():
+                    board.execute(move)
+                    canonical_key = board.canonical_encode()
+                    if canonical_key not in seen:
+                        seen.add(canonical_key)
+                        if board.solved():
+                            return prefix + [move]
+                        next_frontier.append((prefix + [move], board.encode()))
+                    board.undo(move)
+            frontier = next_frontier
+        return frontier
 
 SOME_INITIAL_GAMEBOARD = "_|8H,0C,0S,0S|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|7S,10C,6C,0C"
+# captured deals the solver used to get stuck on
+STUCK_GAMEBOARDS = [
+    "_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S",
+    "_|7S,6S,6D,8D|10D,9D,6D,10D|0D,0H,0H,0C|9S,10S,0S,0S|8D,0D,0H,0D|7S,0C,0S,0S|0D,8S,8S,9S|0H,0C,7D,10S|7D,9D,0C,6S",
+    "_|0H,9D,8S,0D|0D,0D,6S,7D|9S,10D,0C,0H|8D,6D,0C,0H|0H,0D,10S,9D|7S,10D,0S,6S|0S,9S,8D,7S|0S,10S,0S,7D|8S,0C,6D,0C",
+]
 
 def pretty_format_solution(solution: List[Move]):
     return ", ".join(["({} -> {})".format(move.before, move.after) for move in solution])
@@ -353,11 +1534,8 @@ def main():
     # gameboard_str = "0d10s6s10s0s6d0c9d8d7s9s0d0h7s10d0s6d0c10d0d8s0s7d0h0c8d7d0h0s0h9s9d6s0c0d8c"
     # gameboard_str = input("Input your board, then press Enter")
 
-    # The ones that are stuck:
-    # TODO: might be a bug in using wildcard slot
-    gameboard_str = "_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S"
-    # gameboard_str = "_|7S,6S,6D,8D|10D,9D,6D,10D|0D,0H,0H,0C|9S,10S,0S,0S|8D,0D,0H,0D|7S,0C,0S,0S|0D,8S,8S,9S|0H,0C,7D,10S|7D,9D,0C,6S"
-    # gameboard_str = "_|0H,9D,8S,0D|0D,0D,6S,7D|9S,10D,0C,0H|8D,6D,0C,0H|0H,0D,10S,9D|7S,10D,0S,6S|0S,9S,8D,7S|0S,10S,0S,7D|8S,0C,6D,0C"
+    # The ones that were stuck
+    gameboard_str = STUCK_GAMEBOARDS[0]
     gameboard = Gameboard.from_str(gameboard_str)
     print(gameboard)
 
@@ -368,6 +1546,7 @@ def main():
     print("It took {}".format(endtime - starttime))
     print(solution)
     print("{} moves, solution [{}]".format(len(solution), pretty_format_solution(solution)))
+    print(solver.stats.report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
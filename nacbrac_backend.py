@@ -0,0 +1,61 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from nacbrac_vision import to_array
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class ScreenBackend(ABC):
+    """
+    screen capture and mouse input for NacbracBot
+    """
+    @abstractmethod
+    def screenshot(self, region: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        (height, width, 3) float RGB array of the screen region (left, top, width, height)
+        """
+        pass
+
+    @abstractmethod
+    def drag(self, start: Point, end: Point, duration: float) -> None:
+        pass
+
+    @abstractmethod
+    def mouse_down(self, point: Point) -> None:
+        pass
+
+    @abstractmethod
+    def mouse_up(self) -> None:
+        pass
+
+
+class PyAutoGuiBackend(ScreenBackend):
+    """
+    the real screen and mouse
+    """
+    def __init__(self):
+        # needs a desktop session, which the simulated backend doesn't
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def screenshot(self, region: Tuple[int, int, int, int]) -> np.ndarray:
+        return to_array(self._pyautogui.screenshot(region=region))
+
+    def drag(self, start: Point, end: Point, duration: float) -> None:
+        self._pyautogui.moveTo(start.x, start.y)
+        self._pyautogui.dragTo(end.x, end.y, duration, button='left')
+
+    def mouse_down(self, point: Point) -> None:
+        self._pyautogui.moveTo(point.x, point.y)
+        self._pyautogui.mouseDown()
+
+    def mouse_up(self) -> None:
+        self._pyautogui.mouseUp()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict
+from typing import Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from nacbrac import DfsSolver, Gameboard, SolveBudget, SolveResult, SolveStatus, pretty_format_solution
+
+# result status per SolveStatus
+STATUS_NAMES = {SolveStatus.SOLVED: "solved", SolveStatus.UNSOLVABLE: "unsolvable", SolveStatus.GAVE_UP: "timeout"}
+
+
+def status_name(outcome: SolveResult) -> str:
+    """
+    the result status of a search, "pruned" for an incomplete search that ran out of boards
+    """
+    return "pruned" if outcome.reason == "pruned" else STATUS_NAMES[outcome.status]
+
+
+def read_boards(source: TextIO) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """
+    yields (line number, board string, id) per non-empty line.
+    A line is either a board in Gameboard.from_str format, or a JSON object {"board": ..., "id": ...}.
+    Lines that are neither are yielded as they are, to be reported as invalid boards
+    """
+    for line_no, line in enumerate(source, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+                if isinstance(record, dict) and isinstance(record.get("board"), str):
+                    yield line_no, record["board"], record.get("id")
+                    continue
+            except json.JSONDecodeError:
+                pass
+        yield line_no, line, None
+
+
+def solve_board(line_no: int, board_str: str, board_id: Optional[str], time_budget: float, max_depth: int) -> Dict:
+    """
+    solves one board within time_budget seconds, runs in a worker process.
+    Never raises, a board that can't be solved for any reason gets an "invalid" or "error" result
+    """
+    result = {"line": line_no, "id": board_id, "board": board_str}
+    starttime = time.perf_counter()
+    try:
+        gameboard = Gameboard.from_str(board_str)
+        result["board"] = str(gameboard)
+        outcome = DfsSolver(max_depth=max_depth).search(gameboard, SolveBudget(time_limit=time_budget))
+    except (AssertionError, ValueError) as e:
+        result.update(status="invalid", error=str(e), elapsed=time.perf_counter() - starttime)
+        return result
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - starttime)
+        return result
+
+    result.update(
+        status=status_name(outcome),
+        reason=outcome.reason,
+        num_moves=len(outcome.moves),
+        moves=[asdict(move) for move in outcome.moves],
+        solution=pretty_format_solution(outcome.moves),
+        nodes_expanded=outcome.stats.nodes_expanded,
+        elapsed=time.perf_counter() - starttime,
+    )
+    return result
+
+
+def solve_batch(source: TextIO, output: TextIO, workers: Optional[int], time_budget: float, max_depth: int) -> None:
+    """
+    streams one JSON result per line to output, in completion order.
+    At most 2 boards per worker are in flight, so memory stays flat for any input size.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        max_in_flight = 2 * workers
+        in_flight: Set[Future] = set()
+        for line_no, board_str, board_id in read_boards(source):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                _write_results(done, output)
+            in_flight.add(executor.submit(solve_board, line_no, board_str, board_id, time_budget, max_depth))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            _write_results(done, output)
+
+
+def _write_results(done: Set[Future], output: TextIO) -> None:
+    for future in done:
+        output.write(json.dumps(future.result()) + "\n")
+    output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve Nacbrac boards in batch, one board per line (plain or JSONL).")
+    parser.add_argument("input", nargs="?", default="-", help="board file, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="result file (JSONL), - for stdout")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("-t", "--time-budget", type=float, default=60.0, help="seconds per board")
+    parser.add_argument("--max-depth", type=int, default=55, help="DfsSolver search depth")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        solve_batch(source, output, args.workers, args.time_budget, args.max_depth)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from nacbrac import CARDS, Gameboard, IS_FACE, Move, NacbracSolver, SolveBudget, SolveResult, SolveStatus, SolverStats, STACKS_ON, \
+    ZOBRIST_FIELD, ZOBRIST_WILDCARD, Card, WildcardSlot
+
+# cards a field slot of a BoardBatch holds, more than any slot gets in play
+SLOT_CAPACITY = 12
+
+# the nacbrac lookup tables as arrays indexed by card code, 0 being no card
+STACKS_ON_TABLE = np.array(STACKS_ON, dtype=bool)
+IS_FACE_TABLE = np.array(IS_FACE, dtype=bool)
+VALUE_TABLE = np.array([card.value if card is not None else 0 for card in CARDS], dtype=np.int64)
+ZOBRIST_FIELD_TABLE = np.array(ZOBRIST_FIELD[:SLOT_CAPACITY], dtype=np.uint64)
+ZOBRIST_FIELD_TABLE[:, 0] = 0
+ZOBRIST_WILDCARD_TABLE = np.array(ZOBRIST_WILDCARD, dtype=np.uint64)
+ZOBRIST_WILDCARD_TABLE[0] = 0
+
+# moves of a batch: board index, then before, after and num_cards as in Move
+Moves = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class BoardBatch:
+    """
+    N boards as fixed shape arrays: cards[n, slot, position] holds the card codes of each field slot from the bottom up,
+    0 past lengths[n, slot], and wildcard[n] the wildcard card code, 0 for an empty wildcard slot.
+    The questions the solvers ask a Gameboard are answered for the whole batch at once.
+    """
+    def __init__(self, cards: np.ndarray, lengths: np.ndarray, wildcard: np.ndarray):
+        self.cards = cards
+        self.lengths = lengths
+        self.wildcard = wildcard
+        # like Gameboard._run_lengths and _done
+        positions = np.arange(1, SLOT_CAPACITY)
+        in_slot = positions < lengths[:, :, np.newaxis]
+        self._breaks = in_slot & ~STACKS_ON_TABLE[cards[:, :, 1:], cards[:, :, :-1]]
+        self.run_lengths = np.where(lengths > 0, lengths - np.where(self._breaks, positions, 0).max(axis=2), 0)
+        complete = (lengths == 0) | ((lengths == 4) & IS_FACE_TABLE[cards[:, :, 0]]) | ((lengths == 5) & (VALUE_TABLE[cards[:, :, 0]] == 10))
+        self.done = (self.run_lengths == lengths) & complete
+
+    def __len__(self) -> int:
+        return len(self.wildcard)
+
+    @staticmethod
+    def from_gameboards(gameboards: Sequence[Gameboard]) -> "BoardBatch":
+        cards = np.zeros((len(gameboards), 9, SLOT_CAPACITY), dtype=np.int64)
+        lengths = np.zeros((len(gameboards), 9), dtype=np.int64)
+        wildcard = np.zeros(len(gameboards), dtype=np.int64)
+        for idx, gameboard in enumerate(gameboards):
+            if gameboard.wildcard_slot.has_card():
+                wildcard[idx] = gameboard.wildcard_slot.card.code
+            for slot_idx, field_slot in enumerate(gameboard.field_slots):
+                if len(field_slot) > SLOT_CAPACITY:
+                    raise ValueError(f"Field slot {slot_idx} holds {len(field_slot)} cards, more than {SLOT_CAPACITY}")
+                cards[idx, slot_idx, :len(field_slot)] = [card.code for card in field_slot]
+                lengths[idx, slot_idx] = len(field_slot)
+        return BoardBatch(cards, lengths, wildcard)
+
+    def to_gameboard(self, idx: int) -> Gameboard:
+        wildcard_slot = WildcardSlot(Card.from_code(int(self.wildcard[idx]))) if self.wildcard[idx] else WildcardSlot()
+        field_slots = [[Card.from_code(int(code)) for code in self.cards[idx, slot_idx, :self.lengths[idx, slot_idx]]] for slot_idx in range(0, 9)]
+        return Gameboard(wildcard_slot=wildcard_slot, field_slots=field_slots)
+
+    def take(self, indices: np.ndarray) -> "BoardBatch":
+        return BoardBatch(self.cards[indices], self.lengths[indices], self.wildcard[indices])
+
+    def solved(self) -> np.ndarray:
+        return (self.wildcard == 0) & self.done.all(axis=1)
+
+    def heuristic(self) -> np.ndarray:
+        """
+        AStarSolver.heuristic() of every board
+        """
+        return (self.wildcard != 0) + ((1 + self._breaks.sum(axis=2)) * ~self.done).sum(axis=1)
+
+    def zobrist(self) -> np.ndarray:
+        """
+        Gameboard.zobrist of every board
+        """
+        slot_hashes = np.bitwise_xor.reduce(ZOBRIST_FIELD_TABLE[np.arange(SLOT_CAPACITY), self.cards], axis=2)
+        return slot_hashes.sum(axis=1, dtype=np.uint64) + ZOBRIST_WILDCARD_TABLE[self.wildcard]
+
+    def legal_moves(self) -> Moves:
+        """
+        the moves of every board, for each board in the order of get_field_slot_moves() followed by get_wildcard_slot_moves()
+        """
+        cards, lengths, run_lengths = self.cards, self.lengths, self.run_lengths
+        boards = np.arange(len(self))[:, np.newaxis]
+        tops = cards[boards, np.arange(9), np.maximum(lengths - 1, 0)]
+
+        # field slot moves as [board, from slot, to slot], see Gameboard.packed_field_slot_moves
+        from_tops = tops[:, :, np.newaxis]
+        to_tops = tops[:, np.newaxis, :]
+        from_lengths = lengths[:, :, np.newaxis]
+        runs = run_lengths[:, :, np.newaxis]
+        to_empty = (lengths == 0)[:, np.newaxis, :]
+        # the whole run onto an empty slot or a face, onto a value only the cards right below it
+        num_cards = np.where(to_empty | IS_FACE_TABLE[to_tops], runs, VALUE_TABLE[to_tops] - VALUE_TABLE[from_tops])
+        bottom = cards[boards[:, :, np.newaxis], np.arange(9)[:, np.newaxis], np.clip(from_lengths - num_cards, 0, SLOT_CAPACITY - 1)]
+        below = cards[boards[:, :, np.newaxis], np.arange(9)[:, np.newaxis], np.clip(from_lengths - num_cards - 1, 0, SLOT_CAPACITY - 1)]
+        legal = (num_cards > 0) & (num_cards <= runs) & (to_empty | STACKS_ON_TABLE[bottom, to_tops]) \
+            & ~self.done[:, :, np.newaxis] & ~np.eye(9, dtype=bool)
+        # the same rules as get_field_slot_moves(): no whole slot into an empty one, no value run between equal values
+        legal &= ~(to_empty & (num_cards == from_lengths))
+        legal &= ~(~IS_FACE_TABLE[bottom] & ~to_empty & (num_cards < from_lengths) & (VALUE_TABLE[below] == VALUE_TABLE[to_tops]))
+        field_boards, field_before, field_after = np.nonzero(legal)
+        field_num_cards = num_cards[field_boards, field_before, field_after]
+
+        has_wildcard = (self.wildcard != 0)[:, np.newaxis]
+        to_wildcard = ~has_wildcard & (lengths > 1) & (run_lengths == 1)
+        from_wildcard = has_wildcard & ((lengths == 0) | STACKS_ON_TABLE[self.wildcard[:, np.newaxis], tops])
+        to_boards, to_before = np.nonzero(to_wildcard)
+        from_boards, from_after = np.nonzero(from_wildcard)
+
+        all_boards = np.concatenate([field_boards, to_boards, from_boards])
+        order = np.argsort(all_boards, kind="stable")
+        before = np.concatenate([field_before, to_before, np.full(len(from_boards), -1)])
+        after = np.concatenate([field_after, np.full(len(to_boards), -1), from_after])
+        moved = np.concatenate([field_num_cards, np.ones(len(to_boards) + len(from_boards), dtype=np.int64)])
+        return all_boards[order], before[order], after[order], moved[order]
+
+    def execute(self, moves: Moves) -> "BoardBatch":
+        """
+        new batch with one board per move: the move's board after the move
+        """
+        boards, before, after, num_cards = moves
+        cards = self.cards[boards]
+        lengths = self.lengths[boards]
+        wildcard = self.wildcard[boards].copy()
+        rows = np.arange(len(boards))
+
+        to_wildcard = after < 0
+        rows_, slots = rows[to_wildcard], before[to_wildcard]
+        tops = lengths[rows_, slots] - 1
+        wildcard[rows_] = cards[rows_, slots, tops]
+        cards[rows_, slots, tops] = 0
+        lengths[rows_, slots] = tops
+
+        from_wildcard = before < 0
+        rows_, slots = rows[from_wildcard], after[from_wildcard]
+        ends = lengths[rows_, slots]
+        if len(ends) and ends.max() >= SLOT_CAPACITY:
+            raise ValueError(f"Move over {SLOT_CAPACITY} cards into a field slot")
+        cards[rows_, slots, ends] = wildcard[rows_]
+        wildcard[rows_] = 0
+        lengths[rows_, slots] = ends + 1
+
+        transfers = ~to_wildcard & ~from_wildcard
+        rows_, from_slots, to_slots, counts = rows[transfers], before[transfers], after[transfers], num_cards[transfers]
+        starts = lengths[rows_, from_slots] - counts
+        ends = lengths[rows_, to_slots]
+        if len(counts) and (ends + counts).max() > SLOT_CAPACITY:
+            raise ValueError(f"Move over {SLOT_CAPACITY} cards into a field slot")
+        # one card of every moved run at a time
+        for offset in range(0, counts.max() if len(counts) else 0):
+            moving = offset < counts
+            rows_m, from_m, to_m = rows_[moving], from_slots[moving], to_slots[moving]
+            cards[rows_m, to_m, ends[moving] + offset] = cards[rows_m, from_m, starts[moving] + offset]
+            cards[rows_m, from_m, starts[moving] + offset] = 0
+        lengths[rows_, from_slots] = starts
+        lengths[rows_, to_slots] = ends + counts
+        return BoardBatch(cards, lengths, wildcard)
+
+
+class BeamSearchSolver(NacbracSolver):
+    """
+    Breadth first search that keeps the beam_width boards with the best AStarSolver.heuristic() at every depth,
+    and expands each depth as one BoardBatch. Only boards that made it into a beam are remembered as seen, so memory
+    grows by at most beam_width boards per depth, at the price of completeness: once a beam has dropped a board, a search
+    without solution gives up with reason "pruned". UNSOLVABLE is only returned when nothing was dropped, so everything
+    within max_depth was tried.
+    """
+    def __init__(self, beam_width: int = 1000, max_depth: int = 80):
+        super().__init__()
+        self.beam_width = beam_width
+        self.max_depth = max_depth
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        if not gameboard.validate():
+            raise ValueError("Invalid gameboard!")
+
+        budget = budget or SolveBudget()
+        stats = self.stats = SolverStats()
+        starttime = time.perf_counter()
+        frontier = BoardBatch.from_gameboards([gameboard])
+        seen = frontier.zobrist()
+        # per depth, the moves that led to the frontier boards, with their board index in the previous frontier
+        levels: List[Moves] = []
+
+        for depth in range(0, self.max_depth + 1):
+            solved = np.flatnonzero(frontier.solved())
+            if len(solved):
+                stats.elapsed = time.perf_counter() - starttime
+                return SolveResult(SolveStatus.SOLVED, self._reconstruct(gameboard, levels, int(solved[0])), stats)
+            if depth == self.max_depth or not len(frontier):
+                break
+
+            stats.elapsed = time.perf_counter() - starttime
+            memory = seen.nbytes + sum([array.nbytes for level in levels for array in level])
+            reason = budget.exceeded(stats, memory)
+            if reason is not None:
+                return SolveResult(SolveStatus.GAVE_UP, [], stats, reason)
+            if self.on_progress is not None and depth:
+                self.on_progress(stats)
+
+            stats.nodes_expanded += len(frontier)
+            stats.depth_histogram.append(len(frontier))
+            stats.current_depth = depth
+            moves = frontier.legal_moves()
+            wildcard_moves = int(((moves[1] < 0) | (moves[2] < 0)).sum())
+            stats.moves_tried += len(moves[0])
+            stats.wildcard_moves += wildcard_moves
+            stats.field_moves += len(moves[0]) - wildcard_moves
+            children = frontier.execute(moves)
+
+            # first child per board not seen before, then the best of them by heuristic
+            keys = children.zobrist()
+            _, first = np.unique(keys, return_index=True)
+            first.sort()
+            fresh = first[~np.isin(keys[first], seen)]
+            stats.visited_hits += len(keys) - len(fresh)
+            kept = fresh[np.argsort(children.heuristic()[fresh], kind="stable")[:self.beam_width]]
+            stats.pruned_moves += len(fresh) - len(kept)
+            seen = np.union1d(seen, keys[kept])
+            levels.append(tuple(array[kept] for array in moves))
+            frontier = children.take(kept)
+
+        stats.elapsed = time.perf_counter() - starttime
+        if stats.pruned_moves:
+            return SolveResult(SolveStatus.GAVE_UP, [], stats, "pruned")
+        return SolveResult(SolveStatus.UNSOLVABLE, [], stats)
+
+    @staticmethod
+    def _reconstruct(gameboard: Gameboard, levels: List[Moves], idx: int) -> List[Move]:
+        solution: List[Move] = []
+        for boards, before, after, num_cards in reversed(levels):
+            solution.append(Move(int(before[idx]), int(after[idx]), int(num_cards[idx])))
+            idx = int(boards[idx])
+        solution.reverse()
+        # screen positions, as the move generators fill them in
+        board = Gameboard.decode(gameboard.encode())
+        located = []
+        for move in solution:
+            located.append(board.locate(move))
+            board.execute(move)
+        return located
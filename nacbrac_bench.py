@@ -0,0 +1,170 @@
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from nacbrac import AStarSolver, DfsSolver, Gameboard, HistoryOrdering, NacbracSolver, ParallelSolver, SolveBudget, SOME_INITIAL_GAMEBOARD, STUCK_GAMEBOARDS
+from nacbrac_batch import status_name
+from nacbrac_beam import BeamSearchSolver
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+SOLVERS: Dict[str, Callable[[], NacbracSolver]] = {
+    "dfs": DfsSolver,
+    "dfs-no-rules": lambda: DfsSolver(rules=False), # without Gameboard.select_moves, for comparison
+    "dfs-dead-checks": lambda: DfsSolver(dead_checks=True),
+    "dfs-generation-order": lambda: DfsSolver(ordering=None), # moves in generation order, for comparison
+    "dfs-history-order": lambda: DfsSolver(ordering=HistoryOrdering), # static scores plus failure history, for comparison
+    "astar": AStarSolver,
+    "parallel": ParallelSolver,
+    "beam": BeamSearchSolver,
+}
+
+# summary metrics checked against a baseline run
+LOWER_IS_BETTER = ["median_time", "p95_time", "p99_time", "mean_moves", "peak_memory"]
+HIGHER_IS_BETTER = ["solve_rate", "nodes_per_second"]
+
+
+def build_corpus(num_deals: int, first_seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    (name, board) pairs: the known boards from nacbrac.py, then num_deals seeded random deals
+    """
+    corpus = [("initial", SOME_INITIAL_GAMEBOARD)]
+    corpus += [(f"stuck:{i}", board) for i, board in enumerate(STUCK_GAMEBOARDS)]
+    corpus += [(f"seed:{seed}", str(Gameboard.deal(seed))) for seed in range(first_seed, first_seed + num_deals)]
+    return corpus
+
+
+def run_board(solver: NacbracSolver, name: str, board: str, time_budget: float, trace_memory: bool) -> Dict:
+    gameboard = Gameboard.from_str(board)
+    if trace_memory:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+
+    starttime = time.perf_counter()
+    outcome = solver.search(gameboard, SolveBudget(time_limit=time_budget))
+    elapsed = time.perf_counter() - starttime
+
+    return {
+        "name": name,
+        "board": board,
+        "status": status_name(outcome),
+        "reason": outcome.reason,
+        "num_moves": len(outcome.moves),
+        "nodes_expanded": outcome.stats.nodes_expanded,
+        "moves_searched": outcome.stats.field_moves + outcome.stats.wildcard_moves - outcome.stats.pruned_moves,
+        "dead_ends": outcome.stats.dead_ends,
+        "elapsed": elapsed,
+        "peak_memory": tracemalloc.get_traced_memory()[1] - memory_before if trace_memory else None,
+    }
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    # nearest rank
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(results: List[Dict]) -> Dict:
+    times = [result["elapsed"] for result in results]
+    solved = [result for result in results if result["status"] == "solved"]
+    total_nodes = sum([result["nodes_expanded"] for result in results])
+    total_moves = sum([result["moves_searched"] for result in results])
+    total_dead_ends = sum([result["dead_ends"] for result in results])
+    total_time = sum(times)
+    peaks = [result["peak_memory"] for result in results if result["peak_memory"] is not None]
+    return {
+        "boards": len(results),
+        "solved": len(solved),
+        "solve_rate": len(solved) / len(results) if results else None,
+        "nodes_per_second": total_nodes / total_time if total_time > 0 else None,
+        "branching_factor": total_moves / total_nodes if total_nodes > 0 else None,
+        "dead_end_fraction": total_dead_ends / total_nodes if total_nodes > 0 else None,
+        "median_time": statistics.median(times) if times else None,
+        "p95_time": percentile(times, 0.95),
+        "p99_time": percentile(times, 0.99),
+        "mean_moves": statistics.mean([result["num_moves"] for result in solved]) if solved else None,
+        "peak_memory": max(peaks) if peaks else None,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+    }
+
+
+def compare(summary: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    metrics that got worse than baseline by more than tolerance (a fraction)
+    """
+    regressions = []
+    for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        current, previous = summary.get(metric), baseline.get(metric)
+        if current is None or previous is None:
+            continue
+        if metric in LOWER_IS_BETTER and current > previous * (1 + tolerance):
+            regressions.append(f"{metric}: {previous:.6g} -> {current:.6g}")
+        elif metric in HIGHER_IS_BETTER and current < previous * (1 - tolerance):
+            regressions.append(f"{metric}: {previous:.6g} -> {current:.6g}")
+    return regressions
+
+
+def run_benchmark(solver_name: str, num_deals: int, first_seed: int, time_budget: float, trace_memory: bool) -> Dict:
+    solver = SOLVERS[solver_name]()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        results = [run_board(solver, name, board, time_budget, trace_memory) for name, board in build_corpus(num_deals, first_seed)]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        # ParallelSolver keeps its worker processes until closed
+        if hasattr(solver, "close"):
+            solver.close()
+    return {
+        "solver": solver_name,
+        "corpus": {"deals": num_deals, "first_seed": first_seed, "time_budget": time_budget},
+        "python": platform.python_version(),
+        "summary": summarize(results),
+        "boards": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a Nacbrac solver over the known boards and seeded random deals.")
+    parser.add_argument("-s", "--solver", choices=sorted(SOLVERS), default="dfs")
+    parser.add_argument("-n", "--deals", type=int, default=200, help="number of seeded random deals")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("-t", "--time-budget", type=float, default=10.0, help="seconds per board")
+    parser.add_argument("--trace-memory", action="store_true", help="measure per board peak memory (slows solving down)")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="JSON report of an earlier run, exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.solver, args.deals, args.first_seed, args.time_budget, args.trace_memory)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    print(json.dumps(report["summary"]), file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report["summary"], json.load(baseline_file)["summary"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,140 +1,193 @@
-from dataclasses import dataclass
+import argparse
 from datetime import timedelta
-from typing import List
-import pyautogui
+from typing import List, Optional
 import time
 import logging
 import sys
 from math import sqrt
+import numpy as np
 
-from nacbrac import NacbracSolver, DfsSolver, Gameboard, pretty_format_solution, Move, Suit, Card
+from nacbrac import NacbracSolver, DfsSolver, Gameboard, pretty_format_solution, Move, SolveBudget, SolveResult, SolveStatus
+from nacbrac_backend import Point, PyAutoGuiBackend, ScreenBackend
+from nacbrac_cache import CachingSolver
+from nacbrac_optimize import optimize_solution
+from nacbrac_pipeline import SolveWorker
+from nacbrac_service import ServiceSolver
+from nacbrac_vision import BoardRecognizer, CARD_ROW_HEIGHT, FIELD_SLOT_WIDTH, frame_difference, POLL_INTERVAL, STILL_THRESHOLD, \
+    wait_until, wait_until_settled
 
 WILDCARD_SLOT_IMG_LOCATION = (1365, 210, 125, 190)
-CARD_DEALING_WAIT = timedelta(seconds=8)
+# the screen is polled for these steps, the timeouts are only fallbacks
+CARD_DEALING_TIMEOUT = timedelta(seconds=8)
+WIN_BANNER_TIMEOUT = timedelta(seconds=5)
+NEXT_GAME_CLICK_TIMEOUT = timedelta(seconds=0.5)
+SOLVE_TIME_LIMIT = timedelta(seconds=30)
 FOLDER = 'resources/'
 IMAGE_EXT = 'png'
 DETECTION_REGION = (364, 458, 1120, 124)
 WIN_BANNER_REGION = (700, 540, 530, 75)
+IN_GAME_REGION = (1335, 180, 185, 250)
+WILDCARD_SLOT_POINT = Point(1430, 300)
+NEXT_GAME_BUTTON = Point(1377, 898)
 
 log = logging.getLogger(__name__)
 
 
-@dataclass
-class Point:
-    x: int
-    y: int
+def card_location(slot_idx: int, card_idx: int) -> Point:
+    """
+    where the bot grabs and drops the card_idx-th card of a field slot, any card of the wildcard slot for slot_idx -1
+    """
+    if slot_idx < 0:
+        return WILDCARD_SLOT_POINT
+    return Point(int(425 + slot_idx * FIELD_SLOT_WIDTH), int(473 + card_idx * CARD_ROW_HEIGHT))
 
 
 class NacbracBot:
-    def __init__(self, solver: NacbracSolver):
+    def __init__(self, solver: NacbracSolver, recognizer: Optional[BoardRecognizer] = None, pipelined: bool = False,
+                 backend: Optional[ScreenBackend] = None, poll_interval: float = POLL_INTERVAL):
         self._solver = solver
-
-    def run(self):
+        self._backend = backend if backend is not None else PyAutoGuiBackend()
+        self._poll_interval = poll_interval
+        self.games = 0
+        self.wins = 0
+        # solve on a SolveWorker thread and start executing while the optimizer still works on the rest
+        self._pipelined = pipelined
+        # templates are decoded once, not on every poll
+        self._recognizer = recognizer if recognizer is not None else BoardRecognizer(
+            FOLDER, IMAGE_EXT, board_size=(DETECTION_REGION[3], DETECTION_REGION[2]),
+            screen_sizes={"wildcard_slot_empty": (IN_GAME_REGION[3], IN_GAME_REGION[2]), "win": (WIN_BANNER_REGION[3], WIN_BANNER_REGION[2])})
+
+    def run(self, max_games: Optional[int] = None):
         log.info("Start running...")
+        starttime = time.monotonic()
+        worker = SolveWorker(self._solver, SOLVE_TIME_LIMIT.total_seconds()) if self._pipelined else None
 
-        while True:
-            # Detects in game or not
-            log.info("Detecting in game or not...")
-            if self._is_in_game() and not self._is_win():
-                log.info("Found an active game.")
-                gameboard = self._identify_board()
-                log.info(f"Gameboard is {gameboard}")
-                solution = self._solver.solve(gameboard)
-                if solution:
-                    log.info(f"Found solution in {len(solution)} moves: {pretty_format_solution(solution)}")
-                    log.info("Executing solution...")
-                    self._execute_solution(solution)
-                    self._assert_win()
+        try:
+            while max_games is None or self.games < max_games:
+                # Detects in game or not
+                log.info("Detecting in game or not...")
+                if self._is_in_game() and not self._is_win():
+                    log.info("Found an active game.")
+                    if worker is None:
+                        self._play()
+                    else:
+                        self._play_pipelined(worker)
+                    self._goto_next_game()
+                    self.games += 1
+                    log.info(f"{self.games} games, {self.games * 3600 / (time.monotonic() - starttime):.1f} per hour")
+                elif self._is_win():
+                    self._goto_next_game()
                 else:
-                    log.info(f"No solution, starting new game...")
-                self._goto_next_game()
-            elif self._is_win():
-                self._goto_next_game()
-            else:
-                log.info("Not in game. Sleeping...")
-            time.sleep(CARD_DEALING_WAIT.total_seconds())
+                    log.info("Not in game. Waiting...")
+                    self._wait_until(self._is_in_game, CARD_DEALING_TIMEOUT)
+        finally:
+            if worker is not None:
+                worker.close()
+
+    def _play(self) -> None:
+        if not wait_until_settled(self._grab_board, CARD_DEALING_TIMEOUT.total_seconds(), self._poll_interval):
+            log.info("Cards still moving, identifying the board anyway...")
+        gameboard = self._identify_board()
+        log.info(f"Gameboard is {gameboard}")
+        result = self._solver.search(gameboard, SolveBudget(time_limit=SOLVE_TIME_LIMIT.total_seconds()))
+        log.info(f"Solver stats:\n{result.stats.report()}")
+        if result.status == SolveStatus.SOLVED:
+            solution = optimize_solution(gameboard, result.moves)
+            log.info(f"Found solution in {len(result.moves)} moves, optimized to {len(solution)}: {pretty_format_solution(solution)}")
+            log.info("Executing solution...")
+            self._execute_solution(solution)
+            self._assert_win()
+        else:
+            self._log_no_solution(result)
+
+    def _play_pipelined(self, worker: SolveWorker) -> None:
+        gameboard = self._recognize_deal()
+        log.info(f"Gameboard is {gameboard}")
+        job = worker.submit(gameboard)
+        # moves are dragged as soon as the optimizer settles them
+        executed = 0
+        for move in job:
+            if not executed:
+                log.info("Executing solution...")
+            self._execute_solution([move])
+            executed += 1
+        result = job.result
+        log.info(f"Solver stats:\n{result.stats.report()}")
+        if result.status == SolveStatus.SOLVED:
+            log.info(f"Executed {executed} moves: {pretty_format_solution(result.moves)}")
+            self._assert_win()
+        else:
+            # only a cancelled optimizer stops after some moves, and then the bot is shutting down
+            self._log_no_solution(result)
+
+    def _log_no_solution(self, result: SolveResult) -> None:
+        if result.status == SolveStatus.GAVE_UP:
+            log.info(f"Solver gave up ({result.reason} limit), starting new game...")
+        else:
+            log.info(f"No solution, starting new game...")
+
+    def _wait_until(self, condition, timeout: timedelta) -> bool:
+        return wait_until(condition, timeout.total_seconds(), self._poll_interval)
 
     def _is_in_game(self) -> bool:
-        try:
-            result = pyautogui.locateOnScreen(self._get_filepath('wildcard_slot_empty'), region=(1335, 180, 185, 250), grayscale=True)
-            if not result:
-                raise pyautogui.ImageNotFoundException
-            return True
-        except pyautogui.ImageNotFoundException:
-            return False
+        return self._recognizer.contains(self._backend.screenshot(IN_GAME_REGION), "wildcard_slot_empty")
+
+    def _grab_board(self) -> np.ndarray:
+        return self._backend.screenshot(DETECTION_REGION)
+
+    def _recognize_deal(self) -> Gameboard:
+        """
+        identifies the board on every frame while the cards are dealt, instead of waiting for them to settle first.
+        The deal is done once two frames in a row show the same valid board.
+        """
+        previous: Optional[Gameboard] = None
+        def agreed() -> bool:
+            nonlocal previous
+            try:
+                gameboard = self._recognizer.identify(self._grab_board())
+            except AssertionError:
+                gameboard = None
+            done = gameboard is not None and previous is not None and str(gameboard) == str(previous)
+            previous = gameboard
+            return done
+        if self._wait_until(agreed, CARD_DEALING_TIMEOUT):
+            return previous
+        log.info("Cards still moving, identifying the board anyway...")
+        return self._identify_board()
 
     def _identify_board(self) -> Gameboard:
-        # Identify card locations
-        screenshot = pyautogui.screenshot(region=DETECTION_REGION)
-        card_location_dict = {}
-        for i in range(6, 11):
-            fn = str(i) + 'R'
-            card_location_dict[str(i) + 'D'] = self._find_locations(screenshot, self._get_filepath(fn), 2)
-            fn = str(i) + 'B'
-            card_location_dict[str(i) + 'S'] = self._find_locations(screenshot, self._get_filepath(fn), 2)
-        for suit in Suit:
-            card_location_dict['0' + suit.value] = self._find_locations(screenshot, self._get_filepath(suit.value), 4)
-
-        # Reverse to get location and its card
-        location_card_list = []
-        for card, locations in card_location_dict.items():
-            for location in locations:
-                location_card_list.append((location, card))
-        assert len(location_card_list) == 36, f"We detected {len(location_card_list)} card locations."
-
-        # Sort locations from left to right
-        location_card_list.sort(key=lambda t: t[0].left)
-
-        field_slot_boxes = [location_card_list[i:i+4] for i in range(0, 36, 4)]
-        field_slots = []
-        for field_slot_box in field_slot_boxes:
-            # Sort locations from top to bottom
-            field_slot_box.sort(key=lambda t: t[0].top)
-            field_slot = []
-            for dummy, card_str in field_slot_box:
-                field_slot.append(Card.from_str(card_str))
-            field_slots.append(field_slot)
-
-        return Gameboard(field_slots=field_slots)
+        screenshot = self._grab_board()
+        starttime = time.perf_counter()
+        gameboard = self._recognizer.identify(screenshot)
+        log.info(f"Recognized the board in {(time.perf_counter() - starttime) * 1000:.1f}ms")
+        return gameboard
 
     def _execute_solution(self, solution: List[Move]) -> None:
-        def get_card_location(slot_idx: int, card_idx: int) -> Point:
-            if slot_idx < 0:
-                return Point(1430, 300)
-            return Point(int(425 + slot_idx * 133.75), int(473 + card_idx * 29.33))
-
         def move_cards(before: Point, after: Point) -> None:
-            pyautogui.moveTo(before.x, before.y)
             d = Point(after.x - before.x, after.y - before.y)
             speed = sqrt(d.x ** 2 + d.y ** 2) / 800.0
-            pyautogui.dragTo(after.x, after.y, speed, button='left')
+            self._backend.drag(before, after, speed)
 
         for move in solution:
-            before_point = get_card_location(move.before, move.before_idx)
-            after_point = get_card_location(move.after, move.after_idx)
+            before_point = card_location(move.before, move.before_idx)
+            after_point = card_location(move.after, move.after_idx)
             move_cards(before_point, after_point)
 
     def _assert_win(self) -> None:
-        time.sleep(3)
-        assert self._is_win()
+        assert self._wait_until(self._is_win, WIN_BANNER_TIMEOUT)
+        self.wins += 1
 
     def _is_win(self) -> bool:
-        banner = pyautogui.screenshot(region=WIN_BANNER_REGION)
-        return len(list(pyautogui.locateAll(self._get_filepath("win"), banner, grayscale=True))) > 0
+        return self._recognizer.contains(self._backend.screenshot(WIN_BANNER_REGION), "win")
 
     def _goto_next_game(self) -> None:
-        pyautogui.moveTo(1377,898)       
-        pyautogui.mouseDown()
-        time.sleep(0.5) 
-        pyautogui.mouseUp()
-
-    def _get_filepath(self, filename: str) -> str:
-        return f"{FOLDER}{filename}.{IMAGE_EXT}"
-
-    def _find_locations(self, img, fp: str, expected: int):
-        locations = list(pyautogui.locateAll(fp, img, grayscale=False))
-        assert len(locations) == expected, f"Didn't find {expected} cards for {fp}"
-        return locations
+        board = self._grab_board()
+        self._backend.mouse_down(NEXT_GAME_BUTTON)
+        # hold the button until the game reacts
+        self._wait_until(lambda: frame_difference(board, self._grab_board()) > STILL_THRESHOLD, NEXT_GAME_CLICK_TIMEOUT)
+        self._backend.mouse_up()
+        # the next deal is on screen once the wildcard slot shows up empty again
+        self._wait_until(lambda: self._is_in_game() and not self._is_win(), CARD_DEALING_TIMEOUT)
 
 def setup_logging():
     logger = logging.getLogger()
@@ -147,11 +200,17 @@ def setup_logging():
     logger.addHandler(handler)
 
 def main():
+    parser = argparse.ArgumentParser(description="Plays Nacbrac.")
+    parser.add_argument("--pipelined", action="store_true", help="solve on a background thread, overlapping with the screen")
+    parser.add_argument("--service", action="store_true", help="solve through a running nacbrac_service.py, which keeps its cache warm")
+    args = parser.parse_args()
+
     setup_logging()
     logging.info("This is Nacbrac bot.")
 
-    solver: NacbracSolver = DfsSolver()
-    bot: NacbracBot = NacbracBot(solver)
+    # deals repeat, and the cache survives restarts
+    solver: NacbracSolver = ServiceSolver() if args.service else CachingSolver(DfsSolver())
+    bot: NacbracBot = NacbracBot(solver, pipelined=args.pipelined)
 
     bot.run()
 
@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from nacbrac import Gameboard, Move, NacbracSolver, SolveBudget, SolveResult, SolveStatus, SolverStats
+
+DEFAULT_CACHE_PATH = "nacbrac_cache.sqlite3"
+
+# solver attributes that bound how much of the search space a solver covers, and so how far its unsolvable verdict goes
+COMPLETENESS_PARAMETERS = ("max_depth", "beam_width")
+
+
+class CachingSolver(NacbracSolver):
+    """
+    NacbracSolver decorator backed by an SQLite solution store.
+    Boards are keyed by Gameboard.canonical_encode(), so column permutations of a deal share one entry,
+    and moves are stored against the canonical slot order.
+    A board the wrapped solver could not solve is stored as a marker together with the budget that was tried,
+    and only trusted while the wrapped solver runs with that same budget.
+    A search that gave up on its SolveBudget proves nothing and isn't stored.
+    Least recently used entries are evicted above max_entries.
+    """
+    # lookups whose recency is buffered before it is written
+    RECENCY_BATCH = 100
+
+    def __init__(self, solver: NacbracSolver, path: str = DEFAULT_CACHE_PATH, max_entries: int = 100000, budget: Optional[str] = None):
+        super().__init__()
+        self._solver = solver
+        self.max_entries = max_entries
+        self.budget = budget if budget is not None else self._describe(solver)
+        self.hits = 0
+        self.misses = 0
+        # last_used of the boards looked up since the last write, written in one short transaction by the next store(),
+        # close() or once RECENCY_BATCH have piled up, so lookups never hold a write lock other connections wait on
+        self._recent: Dict[bytes, float] = {}
+        # the bot's SolveWorker uses the solver from its own thread, one thread at a time
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS solutions (
+                board BLOB PRIMARY KEY,
+                moves TEXT,
+                budget TEXT,
+                last_used REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+        self._db.commit()
+        # running row count for _evict(), so a store doesn't count the table. Rows other connections add or evict are
+        # only seen by the next CachingSolver on the file
+        self._entries = len(self)
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        if not gameboard.validate():
+            raise ValueError("Invalid gameboard!")
+
+        cached = self.lookup(gameboard)
+        if cached is not None:
+            return cached
+        self._solver.on_progress = self.on_progress
+        result = self._solver.search(gameboard, budget)
+        self.stats = result.stats
+        self.store(gameboard, result)
+        return result
+
+    def lookup(self, gameboard: Gameboard) -> Optional[SolveResult]:
+        """
+        the stored result for gameboard or a column permutation of it, moves in gameboard's slot order. None on a miss
+        """
+        starttime = time.perf_counter()
+        key = gameboard.canonical_encode()
+        row = self._db.execute("SELECT moves, budget FROM solutions WHERE board = ?", (key,)).fetchone()
+        if row is None or (row[0] is None and row[1] != self.budget):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.stats = SolverStats(elapsed=time.perf_counter() - starttime)
+        self._recent[key] = time.time()
+        if len(self._recent) >= self.RECENCY_BATCH:
+            self._write_recent()
+            self._db.commit()
+        if row[0] is None:
+            return SolveResult(SolveStatus.UNSOLVABLE, [], self.stats)
+        slot_map = gameboard.canonical_order()
+        return SolveResult(SolveStatus.SOLVED, [move.relabel(slot_map) for move in self._decode_moves(row[0])], self.stats)
+
+    def store(self, gameboard: Gameboard, result: SolveResult) -> None:
+        """
+        remember the wrapped solver's result for gameboard, unless it gave up
+        """
+        if result.status == SolveStatus.GAVE_UP:
+            return
+        slot_map = gameboard.canonical_order()
+        to_canonical = [0] * len(slot_map)
+        for canonical_idx, slot_idx in enumerate(slot_map):
+            to_canonical[slot_idx] = canonical_idx
+        moves = self._encode_moves([move.relabel(to_canonical) for move in result.moves]) if result.moves else None
+        key = gameboard.canonical_encode()
+        if self._db.execute("SELECT 1 FROM solutions WHERE board = ?", (key,)).fetchone() is None:
+            self._entries += 1
+        self._db.execute("INSERT OR REPLACE INTO solutions (board, moves, budget, last_used) VALUES (?, ?, ?, ?)",
+                         (key, moves, None if result.moves else self.budget, time.time()))
+        self._write_recent()
+        self._evict()
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self) -> None:
+        self._write_recent()
+        self._db.commit()
+        self._db.close()
+
+    def _write_recent(self) -> None:
+        if self._recent:
+            self._db.executemany("UPDATE solutions SET last_used = ? WHERE board = ?", [(last_used, key) for key, last_used in self._recent.items()])
+            self._recent.clear()
+
+    def _evict(self) -> None:
+        excess = self._entries - self.max_entries
+        if excess > 0:
+            deleted = self._db.execute("DELETE FROM solutions WHERE board IN (SELECT board FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+            self._entries -= deleted.rowcount
+
+    @staticmethod
+    def _encode_moves(moves: List[Move]) -> str:
+        return json.dumps([[move.before, move.after, move.num_cards, move.before_idx, move.after_idx] for move in moves])
+
+    @staticmethod
+    def _decode_moves(source: str) -> List[Move]:
+        return [Move(*fields) for fields in json.loads(source)]
+
+    @staticmethod
+    def _describe(solver: NacbracSolver) -> str:
+        parameters = [f"{name}={getattr(solver, name)}" for name in COMPLETENESS_PARAMETERS if getattr(solver, name, None) is not None]
+        return type(solver).__name__ + (f"({', '.join(parameters)})" if parameters else "")
@@ -0,0 +1,137 @@
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from nacbrac import Gameboard, Move
+
+# depth of the shortcut search from every board on the solution path
+SHORTCUT_DEPTH = 2
+
+
+def optimize_solution(gameboard: Gameboard, solution: List[Move], shortcut_depth: int = SHORTCUT_DEPTH) -> List[Move]:
+    """
+    shorter solution for gameboard, every move of it costs the bot a mouse drag.
+    Cuts out stretches that come back to a board seen before (move/undo pairs included), then splices in
+    shortcuts found by a breadth first search of up to shortcut_depth moves between boards on the path.
+    Boards match up to column permutations, the moves after a cut are relabelled to fit.
+    before_idx/after_idx are recomputed for the returned moves, gameboard is left unchanged.
+    """
+    located = list(iter_optimized_solution(gameboard, solution, shortcut_depth))
+    board = Gameboard.decode(gameboard.encode())
+    for move in located:
+        board.execute(move)
+    assert board.solved() or not solution, "Optimized solution doesn't solve the board"
+    return located
+
+
+def iter_optimized_solution(gameboard: Gameboard, solution: List[Move], shortcut_depth: int = SHORTCUT_DEPTH) -> Iterator[Move]:
+    """
+    optimize_solution() move by move: a move is final once it is yielded, so executing the solution can start
+    while shortcuts are still searched for the rest of it
+    """
+    moves = _remove_cycles(gameboard, solution)
+    board = Gameboard.decode(gameboard.encode())
+    # boards the yielded moves went through, shortcuts don't come back to them
+    passed = {board.canonical_encode()}
+    start = 0
+    while start < len(moves):
+        if shortcut_depth > 0:
+            moves = moves[:start] + _splice_shortcut(board, moves[start:], shortcut_depth, passed)
+        move = board.locate(moves[start])
+        board.execute(move)
+        passed.add(board.canonical_encode())
+        start += 1
+        yield move
+
+
+def _slot_mapping(target_order: List[int], source_order: List[int]) -> List[int]:
+    """
+    slot_map for Move.relabel carrying moves over from one board to a column permutation of it,
+    given the canonical_order() of both
+    """
+    slot_map = [0] * len(source_order)
+    for canonical_idx, slot_idx in enumerate(source_order):
+        slot_map[slot_idx] = target_order[canonical_idx]
+    return slot_map
+
+
+def _remove_cycles(gameboard: Gameboard, solution: List[Move]) -> List[Move]:
+    # board follows the shortened path, slot_map carries the original moves over to it
+    board = Gameboard.decode(gameboard.encode())
+    slot_map = list(range(0, 9))
+    # canonical key -> number of moves that reach it on the shortened path, and the board's canonical_order
+    seen: Dict[bytes, Tuple[int, List[int]]] = {board.canonical_encode(): (0, board.canonical_order())}
+    moves: List[Move] = []
+    for move in solution:
+        move = move.relabel(slot_map)
+        board.execute(move)
+        moves.append(move)
+        key = board.canonical_encode()
+        if key not in seen:
+            seen[key] = (len(moves), board.canonical_order())
+            continue
+        # back at an earlier board, maybe with the columns permuted: drop the detour
+        num_moves, order = seen[key]
+        back_to_earlier = _slot_mapping(order, board.canonical_order())
+        slot_map = [back_to_earlier[idx] for idx in slot_map]
+        for dropped in reversed(moves[num_moves:]):
+            board.undo(dropped)
+        del moves[num_moves:]
+        seen = {key: value for key, value in seen.items() if value[0] <= num_moves}
+    return moves
+
+
+def _splice_shortcut(board: Gameboard, moves: List[Move], shortcut_depth: int, passed: Set[bytes]) -> List[Move]:
+    """
+    moves from board, with the shortcut from board that saves the most moves spliced in
+    """
+    path_board = Gameboard.decode(board.encode())
+    path_boards = [path_board.encode()]
+    for move in moves:
+        path_board.execute(move)
+        path_boards.append(path_board.encode())
+    path_idx = {Gameboard.decode(key).canonical_encode(): idx for idx, key in enumerate(path_boards)}
+
+    shortcut = _find_shortcut(path_boards[0], path_idx, shortcut_depth, passed)
+    if shortcut is None:
+        return moves
+    shortcut_moves, end, end_board = shortcut
+    to_shortcut = _slot_mapping(end_board.canonical_order(), Gameboard.decode(path_boards[end]).canonical_order())
+    return shortcut_moves + [move.relabel(to_shortcut) for move in moves[end:]]
+
+
+def _find_shortcut(start_key: bytes, path_idx: Dict[bytes, int], max_depth: int, passed: Set[bytes]) -> Optional[Tuple[List[Move], int, Gameboard]]:
+    """
+    (moves, path index it leads to, board it leads to) for the shortcut from the first path board
+    that saves the most moves without going through a passed board, None if no board within max_depth moves saves any
+    """
+    start_board = Gameboard.decode(start_key)
+    # canonical key -> (encoded board, parent canonical key, move from the parent)
+    nodes: Dict[bytes, Tuple[bytes, Optional[bytes], Optional[Move]]] = {start_board.canonical_encode(): (start_key, None, None)}
+    frontier = deque([(start_board.canonical_encode(), 0)])
+    best: Optional[Tuple[int, bytes, int]] = None # (moves saved, canonical key, path index)
+    while frontier:
+        key, depth = frontier.popleft()
+        if depth == max_depth:
+            continue
+        board = Gameboard.decode(nodes[key][0])
+        for move in board.get_field_slot_moves() + board.get_wildcard_slot_moves():
+            board.execute(move)
+            next_key = board.canonical_encode()
+            if next_key not in nodes and next_key not in passed:
+                nodes[next_key] = (board.encode(), key, move)
+                frontier.append((next_key, depth + 1))
+                end = path_idx.get(next_key, -1)
+                saved = end - (depth + 1)
+                if saved > 0 and (best is None or saved > best[0]):
+                    best = (saved, next_key, end)
+            board.undo(move)
+
+    if best is None:
+        return None
+    shortcut_moves = []
+    key = best[1]
+    while nodes[key][1] is not None:
+        shortcut_moves.append(nodes[key][2])
+        key = nodes[key][1]
+    shortcut_moves.reverse()
+    return shortcut_moves, best[2], Gameboard.decode(nodes[best[1]][0])
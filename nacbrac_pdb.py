@@ -0,0 +1,326 @@
+import argparse
+import hashlib
+import mmap
+import os
+import re
+import struct
+import time
+from typing import Callable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from nacbrac import CARDS, Gameboard, Suit, STUCK_GAMEBOARDS
+
+DEFAULT_FOLDER = "resources/pdb/"
+
+# token of every card outside the pattern. Neighbouring ones merge, so one X stands for a pile of one or more cards
+X = 1
+# distance of a board the abstraction can't solve, so neither can the real game
+UNSOLVABLE = 255
+_X_PILE = re.compile(bytes([X, ord("+")]))
+
+# file header: magic, abstraction name, number of entries
+HEADER = struct.Struct("<8s16sQ")
+MAGIC = b"NACPDB01"
+
+
+class Abstraction:
+    """
+    boards projected onto a pattern of cards that only ever stack on each other, like the four faces of a suit.
+    Every other card becomes X, so a slot reads like X,F,X,F,F. An abstract board is keyed by its wildcard token and
+    its slots in sorted order, column order doesn't matter.
+    The abstract moves are a relaxation: any top part of an X pile moves as a run and an X goes anywhere some card
+    outside the pattern could, so every real move is an abstract move and the abstract distance to the goal is a
+    lower bound on the real one.
+    """
+    def __init__(self, name: str, stacks: List[List[bool]], goal: bytes, projections: List[List[int]]):
+        self.name = name
+        # stacks[token][below]: token can be placed on below
+        self.stacks = stacks
+        self.goal = goal
+        # token per card code, one table per pattern a board is looked up for, e.g. one per suit
+        self.projections = projections
+        self._translations = [bytes(tokens + [0] * (256 - len(tokens))) for tokens in projections]
+
+    def keys(self, encoded: bytes) -> List[bytes]:
+        """
+        the abstract board for each projection of the board with Gameboard.encode() encoded
+        """
+        keys = []
+        for translation in self._translations:
+            # Gameboard.encode() with card codes turned into tokens, slots still 0 separated
+            tokens = encoded.translate(translation)
+            slots = _X_PILE.sub(b"\x01", tokens[1:-1]).split(b"\0")
+            keys.append(tokens[:1] + b"\0".join(sorted(slots)))
+        return keys
+
+    def successors(self, key: bytes) -> Set[bytes]:
+        """
+        abstract boards one move away from key
+        """
+        stacks = self.stacks
+        wildcard = key[0]
+        slots = key[1:].split(b"\0")
+        successors: Set[bytes] = set()
+        for from_idx, from_slot in enumerate(slots):
+            if from_idx and from_slot == slots[from_idx - 1]:
+                continue # same as the slot before
+            for run, rests in self._top_runs(from_slot):
+                for rest in rests:
+                    for to_idx, to_slot in enumerate(slots):
+                        if to_idx != from_idx and (not to_slot or stacks[run[0]][to_slot[-1]]):
+                            moved = list(slots)
+                            moved[from_idx] = rest
+                            moved[to_idx] = _merge(to_slot, run)
+                            successors.add(_encode(wildcard, moved))
+                    if not wildcard and len(run) == 1:
+                        moved = list(slots)
+                        moved[from_idx] = rest
+                        successors.add(_encode(run[0], moved))
+        if wildcard:
+            for to_idx, to_slot in enumerate(slots):
+                if not to_slot or stacks[wildcard][to_slot[-1]]:
+                    moved = list(slots)
+                    moved[to_idx] = _merge(to_slot, bytes([wildcard]))
+                    successors.add(_encode(0, moved))
+        return successors
+
+    def predecessors(self, key: bytes) -> Set[bytes]:
+        """
+        abstract boards one move before key, the moves of successors() backwards
+        """
+        stacks = self.stacks
+        wildcard = key[0]
+        slots = key[1:].split(b"\0")
+        predecessors: Set[bytes] = set()
+        for to_idx, to_slot in enumerate(slots):
+            if to_idx and to_slot == slots[to_idx - 1]:
+                continue
+            # the run on top was put there, onto what is left below it
+            for run, belows in self._top_runs(to_slot):
+                for below in belows:
+                    if below and not stacks[run[0]][below[-1]]:
+                        continue
+                    for from_idx, from_slot in enumerate(slots):
+                        if from_idx != to_idx:
+                            moved = list(slots)
+                            moved[to_idx] = below
+                            moved[from_idx] = _merge(from_slot, run)
+                            predecessors.add(_encode(wildcard, moved))
+                    if not wildcard and len(run) == 1:
+                        # from the wildcard slot
+                        moved = list(slots)
+                        moved[to_idx] = below
+                        predecessors.add(_encode(run[0], moved))
+        if wildcard:
+            # into the wildcard slot, from the top of any slot
+            for from_idx, from_slot in enumerate(slots):
+                moved = list(slots)
+                moved[from_idx] = _merge(from_slot, bytes([wildcard]))
+                predecessors.add(_encode(0, moved))
+        return predecessors
+
+    def _top_runs(self, slot: bytes):
+        # (run, what can be left below it) for every run on top of slot, a run starting in an X pile leaves
+        # either the whole pile's place empty or part of the pile behind
+        stacks = self.stacks
+        for start in range(len(slot) - 1, -1, -1):
+            if start < len(slot) - 1 and not stacks[slot[start + 1]][slot[start]]:
+                break
+            if slot[start] == X:
+                yield slot[start:], (slot[:start], slot[:start + 1])
+            else:
+                yield slot[start:], (slot[:start],)
+
+
+def _merge(slot: bytes, run: bytes) -> bytes:
+    if slot and slot[-1] == X and run[0] == X:
+        return slot + run[1:]
+    return slot + run
+
+
+def _encode(wildcard: int, slots: List[bytes]) -> bytes:
+    # tokens are never 0, so it separates the slots
+    return bytes([wildcard]) + b"\0".join(sorted(slots))
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _stacks(num_tokens: int, pairs: Sequence) -> List[List[bool]]:
+    stacks = [[False] * num_tokens for _ in range(0, num_tokens)]
+    for token, below in pairs:
+        stacks[token][below] = True
+    return stacks
+
+
+def face_abstraction() -> Abstraction:
+    """
+    the four faces of one suit, looked up for every suit
+    """
+    face = 2
+    goal = _encode(0, [bytes([face] * 4)] + [bytes([X])] * 7 + [b""])
+    projections = [[0] + [face if card.is_face() and card.suit == suit else X for card in CARDS[1:]] for suit in Suit]
+    return Abstraction("faces", _stacks(3, [(X, X), (face, face)]), goal, projections)
+
+
+def value_abstraction(num_values: int = 3) -> Abstraction:
+    """
+    the num_values highest cards of one colour parity, both copies of each: red 10s, black 9s, red 8s and so on,
+    or the other way round. A card only stacks on the same parity, looked up for both. Unless the pattern goes down
+    to 6 the rest of the run is outside it, so an X can go on the lowest value.
+    """
+    values = list(range(10, 10 - num_values, -1))
+    tokens = {value: 2 + idx for idx, value in enumerate(values)}
+    pairs = [(X, X)] + [(tokens[value - 1], tokens[value]) for value in values[:-1]]
+    run = [tokens[value] for value in values]
+    if values[-1] > 6:
+        pairs.append((X, tokens[values[-1]]))
+        run.append(X)
+    goal = _encode(0, [bytes(run)] * 2 + [bytes([X])] * 6 + [b""])
+
+    def in_pattern(card, red_even: bool) -> bool:
+        return not card.is_face() and card.value in tokens and (card.is_red() == (card.value % 2 == 0)) == red_even
+
+    projections = [[0] + [tokens[card.value] if in_pattern(card, red_even) else X for card in CARDS[1:]] for red_even in (True, False)]
+    return Abstraction(f"values{num_values}", _stacks(2 + num_values, pairs), goal, projections)
+
+
+class PatternDatabase:
+    """
+    exact distance to the goal of every abstract board that can reach it, found by breadth first search backwards
+    from the goal. Boards are stored by a 64 bit hash of their key, sorted for binary search.
+    On disk: HEADER, the hashes as little endian uint64, then the distances as uint8. load() memory maps both.
+    """
+    def __init__(self, abstraction: Abstraction, hashes: np.ndarray, distances: np.ndarray):
+        self.abstraction = abstraction
+        self.hashes = hashes
+        self.distances = distances
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @staticmethod
+    def build(abstraction: Abstraction, on_progress: Optional[Callable[[int, int], None]] = None) -> "PatternDatabase":
+        """
+        on_progress is called with the distance and number of boards of each finished layer
+        """
+        found = {abstraction.goal: 0}
+        layer = [abstraction.goal]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for key in layer:
+                for predecessor in abstraction.predecessors(key):
+                    if predecessor not in found:
+                        found[predecessor] = distance
+                        next_layer.append(predecessor)
+            layer = next_layer
+            if on_progress is not None:
+                on_progress(distance, len(found))
+        if distance >= UNSOLVABLE:
+            raise ValueError(f"{abstraction.name} needs {distance} moves, more than the uint8 distances hold")
+
+        hashes = np.fromiter((_hash(key) for key in found), dtype=np.uint64, count=len(found))
+        distances = np.fromiter(found.values(), dtype=np.uint8, count=len(found))
+        order = np.argsort(hashes)
+        hashes = hashes[order]
+        if np.any(hashes[1:] == hashes[:-1]):
+            raise ValueError(f"Hash collision in {abstraction.name}")
+        return PatternDatabase(abstraction, hashes, distances[order])
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as output:
+            output.write(HEADER.pack(MAGIC, self.abstraction.name.encode(), len(self)))
+            output.write(self.hashes.astype("<u8").tobytes())
+            output.write(self.distances.tobytes())
+
+    @staticmethod
+    def load(abstraction: Abstraction, path: str) -> "PatternDatabase":
+        with open(path, "rb") as source:
+            # plain arrays over the mapping, np.memmap's own indexing is several times slower per lookup
+            mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, name, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC or name.rstrip(b"\0").decode() != abstraction.name:
+            raise ValueError(f"{path} is not a {abstraction.name} pattern database")
+        hashes = np.frombuffer(mapped, dtype="<u8", count=count, offset=HEADER.size)
+        distances = np.frombuffer(mapped, dtype=np.uint8, count=count, offset=HEADER.size + 8 * count)
+        return PatternDatabase(abstraction, hashes, distances)
+
+    def lookup(self, gameboard: Gameboard) -> np.ndarray:
+        """
+        distance per projection
+        """
+        return self.distances_of(self.abstraction.keys(gameboard.encode()))
+
+    def distances_of(self, keys: List[bytes]) -> np.ndarray:
+        """
+        distance per abstract board, UNSOLVABLE for those that can't reach the goal
+        """
+        hashes = np.array([_hash(key) for key in keys], dtype=np.uint64)
+        idx = np.minimum(np.searchsorted(self.hashes, hashes), len(self) - 1)
+        return np.where(self.hashes[idx] == hashes, self.distances[idx], UNSOLVABLE)
+
+    def lower_bound(self, gameboard: Gameboard) -> int:
+        return int(self.lookup(gameboard).max())
+
+
+class PatternHeuristic:
+    """
+    lower bound on the moves left to solve a board, the largest distance any pattern database gives.
+    The patterns are part of each other's X piles, one move can bring several closer at once, so they don't add up.
+    It's a plain Gameboard -> int callable for any solver, e.g. DfsSolver(lower_bound=PatternHeuristic.load()).
+    """
+    def __init__(self, databases: List[PatternDatabase]):
+        self.databases = databases
+
+    @staticmethod
+    def load(folder: str = DEFAULT_FOLDER) -> "PatternHeuristic":
+        return PatternHeuristic([PatternDatabase.load(abstraction, database_path(abstraction, folder)) for abstraction in default_abstractions()])
+
+    def __call__(self, gameboard: Gameboard) -> int:
+        encoded = gameboard.encode()
+        return max([int(database.distances_of(database.abstraction.keys(encoded)).max()) for database in self.databases])
+
+
+def default_abstractions() -> List[Abstraction]:
+    return [face_abstraction(), value_abstraction(3)]
+
+
+def database_path(abstraction: Abstraction, folder: str = DEFAULT_FOLDER) -> str:
+    return os.path.join(folder, f"{abstraction.name}.pdb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pattern databases and measure lookups.")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER)
+    parser.add_argument("--rebuild", action="store_true", help="build databases that already exist again")
+    parser.add_argument("-n", "--deals", type=int, default=200, help="random deals to measure lookups on")
+    args = parser.parse_args()
+
+    os.makedirs(args.folder, exist_ok=True)
+    for abstraction in default_abstractions():
+        path = database_path(abstraction, args.folder)
+        if os.path.exists(path) and not args.rebuild:
+            continue
+        starttime = time.perf_counter()
+        database = PatternDatabase.build(abstraction, lambda distance, count: print(f"{abstraction.name}: {count} boards within {distance} moves"))
+        database.save(path)
+        print(f"{abstraction.name}: built {len(database)} boards in {time.perf_counter() - starttime:.1f}s, "
+              f"max distance {database.distances.max()}, {os.path.getsize(path)} bytes")
+
+    starttime = time.perf_counter()
+    heuristic = PatternHeuristic.load(args.folder)
+    print(f"loaded in {(time.perf_counter() - starttime) * 1000:.2f}ms")
+
+    gameboards = [Gameboard.deal(seed) for seed in range(0, args.deals)] + [Gameboard.from_str(board) for board in STUCK_GAMEBOARDS]
+    starttime = time.perf_counter()
+    bounds = [heuristic(gameboard) for gameboard in gameboards]
+    elapsed = time.perf_counter() - starttime
+    print(f"{len(gameboards) / elapsed:.0f} lookups/s, mean lower bound {sum(bounds) / len(bounds):.2f}, max {max(bounds)}")
+
+
+if __name__ == "__main__":
+    main()
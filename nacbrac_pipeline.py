@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+from nacbrac import CancellationToken, Gameboard, Move, NacbracSolver, SolveBudget, SolveResult, SolveStatus, SolverStats
+from nacbrac_optimize import iter_optimized_solution
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class SolveJob:
+    """
+    a board handed to a SolveWorker. Iterating it blocks for the solution's moves, each one as soon as the
+    optimizer has settled it; result is set once they are all through.
+    """
+    gameboard: Gameboard
+    result: Optional[SolveResult] = None
+    _handoff: "queue.Queue[Union[Move, SolveResult]]" = field(default_factory=queue.Queue, repr=False)
+
+    def __iter__(self) -> Iterator[Move]:
+        while self.result is None:
+            item = self._handoff.get()
+            if isinstance(item, SolveResult):
+                self.result = item
+            else:
+                yield item
+
+    def wait(self) -> SolveResult:
+        for _ in self:
+            pass
+        return self.result
+
+
+class SolveWorker:
+    """
+    Runs a solver and the solution optimizer on a background thread, so the bot can execute the first moves of a
+    solution and watch the screen meanwhile. The solver is only ever used from that thread.
+    close() cancels the running search and stops the thread, jobs still queued end as GAVE_UP.
+    """
+    def __init__(self, solver: NacbracSolver, time_limit: Optional[float] = None):
+        self._solver = solver
+        self.time_limit = time_limit
+        self._jobs: "queue.Queue[Optional[SolveJob]]" = queue.Queue()
+        self._cancellation = CancellationToken()
+        self._thread = threading.Thread(target=self._run, name="solve-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, gameboard: Gameboard) -> SolveJob:
+        # the caller keeps playing on its board while the job is queued
+        job = SolveJob(gameboard.copy())
+        self._jobs.put(job)
+        return job
+
+    def close(self) -> None:
+        self._cancellation.cancel()
+        self._jobs.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "SolveWorker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                result = self._solve(job)
+            except Exception:
+                log.exception(f"Solving {job.gameboard} failed")
+                result = SolveResult(SolveStatus.GAVE_UP, [], SolverStats(), "error")
+            job._handoff.put(result)
+
+    def _solve(self, job: SolveJob) -> SolveResult:
+        if self._cancellation.is_cancelled():
+            return SolveResult(SolveStatus.GAVE_UP, [], SolverStats(), "cancelled")
+        budget = SolveBudget(time_limit=self.time_limit, cancellation=self._cancellation)
+        result = self._solver.search(job.gameboard, budget)
+        if result.status != SolveStatus.SOLVED:
+            return result
+
+        moves = []
+        for move in iter_optimized_solution(job.gameboard, result.moves):
+            if self._cancellation.is_cancelled():
+                return SolveResult(SolveStatus.GAVE_UP, moves, result.stats, "cancelled")
+            job._handoff.put(move)
+            moves.append(move)
+        return SolveResult(SolveStatus.SOLVED, moves, result.stats)
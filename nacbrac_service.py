@@ -0,0 +1,350 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple, Union
+
+from nacbrac import DfsSolver, Gameboard, Move, NacbracSolver, SolveBudget, SolveResult, SolveStatus, SolverStats
+from nacbrac_cache import CachingSolver, DEFAULT_CACHE_PATH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+# seconds a client waits for an answer beyond the time limit, for queueing behind other boards and the round trip
+RESPONSE_GRACE = 5.0
+# seconds between checks of a budget's cancellation token while waiting
+CANCELLATION_POLL = 0.1
+
+log = logging.getLogger(__name__)
+
+# the solver of a pool worker process, made once when the process starts and kept for every board it gets
+_worker_solver: Optional[NacbracSolver] = None
+
+
+def _init_worker(max_depth: int) -> None:
+    global _worker_solver
+    _worker_solver = DfsSolver(max_depth)
+
+
+def _solve_in_worker(board: bytes, time_limit: Optional[float], max_nodes: Optional[int]) -> SolveResult:
+    return _worker_solver.search(Gameboard.decode(board), SolveBudget(time_limit=time_limit, max_nodes=max_nodes))
+
+
+def encode_result(result: SolveResult) -> Dict:
+    return {
+        "status": result.status.value,
+        "reason": result.reason,
+        "moves": [asdict(move) for move in result.moves],
+        "nodes_expanded": result.stats.nodes_expanded,
+        "elapsed": result.stats.elapsed,
+    }
+
+
+def decode_result(response: Dict) -> SolveResult:
+    if "error" in response:
+        raise ValueError(response["error"])
+    stats = SolverStats(nodes_expanded=response["nodes_expanded"], elapsed=response["elapsed"])
+    return SolveResult(SolveStatus(response["status"]), [Move(**fields) for fields in response["moves"]], stats, response["reason"])
+
+
+class SolveService:
+    """
+    Long running solver for the bot and batch clients on the same machine, over localhost TCP or a Unix socket.
+    Both ways it's one JSON object per line:
+    request {"id": any, "board": Gameboard.__str__ format, "time_limit": seconds, "max_nodes": optional},
+    answered with {"id", "status", "reason", "moves": Move fields, "nodes_expanded", "elapsed", "cached"} or {"id", "error"},
+    and {"id", "op": "stats"} answered with the service counters. Answers come as boards finish, not in request order.
+    Boards are solved in a process pool whose workers keep their solver and imports from one board to the next, and
+    results are kept in a CachingSolver store. A board that is already being solved, or a column permutation of it,
+    waits for that search instead of starting another one, under the first request's budget.
+    """
+    def __init__(self, workers: Optional[int] = None, max_depth: int = 55, cache_path: str = DEFAULT_CACHE_PATH):
+        self.max_depth = max_depth
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(max_depth,))
+        # only its store is used here, the wrapped solver stands for the workers' one in the unsolvable markers
+        self._cache = CachingSolver(DfsSolver(max_depth), cache_path)
+        # canonical board -> search running for it
+        self._in_flight: Dict[bytes, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        # connection handler -> its writer
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.requests = 0
+        self.solves = 0
+        self.coalesced = 0
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: Optional[str] = None) -> None:
+        """
+        listen on the Unix socket path if given, otherwise on host:port
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path)
+        else:
+            self._server = await asyncio.start_server(self._serve, host, port)
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # the handlers read to the end of their connection and return once their answers are sent
+        connections = list(self._connections)
+        for writer in self._connections.values():
+            writer.close()
+        # queued boards are dropped, running searches finish and are cached
+        in_flight = list(self._in_flight.values())
+        await asyncio.to_thread(self._executor.shutdown, cancel_futures=True)
+        await asyncio.gather(*in_flight, *connections, return_exceptions=True)
+        self._cache.close()
+
+    def counters(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "cache_hits": self._cache.hits,
+            "solves": self.solves,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+    async def solve(self, gameboard: Gameboard, time_limit: Optional[float] = None, max_nodes: Optional[int] = None) -> Tuple[SolveResult, bool]:
+        """
+        result with moves for gameboard's slot order, and whether it came from the cache
+        """
+        self.requests += 1
+        cached = self._cache.lookup(gameboard)
+        if cached is not None:
+            return cached, True
+
+        key = gameboard.canonical_encode()
+        search = self._in_flight.get(key)
+        if search is None:
+            self.solves += 1
+            search = asyncio.get_running_loop().run_in_executor(self._executor, _solve_in_worker, key, time_limit, max_nodes)
+            self._in_flight[key] = search
+            search.add_done_callback(lambda _: self._finish(key, search))
+        else:
+            self.coalesced += 1
+        # a client hanging up doesn't stop the search, others may wait for it and the cache gets the result
+        try:
+            result = await asyncio.shield(search)
+        except asyncio.CancelledError:
+            if not search.cancelled():
+                raise
+            return SolveResult(SolveStatus.GAVE_UP, [], SolverStats(), "cancelled"), False # dropped by close()
+        slot_map = gameboard.canonical_order()
+        return SolveResult(result.status, [move.relabel(slot_map) for move in result.moves], result.stats, result.reason), False
+
+    def _finish(self, key: bytes, search: asyncio.Future) -> None:
+        del self._in_flight[key]
+        if not search.cancelled() and search.exception() is None:
+            self._cache.store(Gameboard.decode(key), search.result())
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        answers = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                answer = asyncio.create_task(self._answer(line, writer))
+                answers.add(answer)
+                answer.add_done_callback(answers.discard)
+            await asyncio.gather(*answers)
+        finally:
+            writer.close()
+            del self._connections[connection]
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("op") == "stats":
+                response = self.counters()
+            else:
+                gameboard = Gameboard.from_str(request["board"])
+                gameboard.validate()
+                result, cached = await self.solve(gameboard, request.get("time_limit"), request.get("max_nodes"))
+                response = dict(encode_result(result), cached=cached)
+        except (AssertionError, KeyError, TypeError, ValueError) as e:
+            response = {"error": f"Invalid request: {e}"}
+        except Exception as e:
+            log.exception(f"Answering {line!r} failed")
+            response = {"error": f"Solving failed: {e}"}
+        response["id"] = request_id
+        try:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+        except ConnectionError:
+            pass # the client is gone
+
+
+class ServiceClient:
+    """
+    asyncio client of a SolveService, any number of requests can be waiting on the one connection
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @staticmethod
+    async def connect(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: Optional[str] = None) -> "ServiceClient":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return ServiceClient(reader, writer)
+
+    async def search(self, gameboard: Union[Gameboard, str], time_limit: Optional[float] = None, max_nodes: Optional[int] = None) -> SolveResult:
+        response = await self._request({"board": str(gameboard), "time_limit": time_limit, "max_nodes": max_nodes})
+        return decode_result(response)
+
+    async def stats(self) -> Dict:
+        return await self._request({"op": "stats"})
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+    async def _request(self, request: Dict) -> Dict:
+        request_id = next(self._ids)
+        answer = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = answer
+        self._writer.write((json.dumps(dict(request, id=request_id)) + "\n").encode())
+        await self._writer.drain()
+        return await answer
+
+    async def _receive(self) -> None:
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            answer = self._waiting.pop(response.pop("id"), None)
+            if answer is not None and not answer.done():
+                answer.set_result(response)
+        for answer in self._waiting.values():
+            answer.set_exception(ConnectionError("Solve service closed the connection"))
+        self._waiting.clear()
+
+
+class ServiceSolver(NacbracSolver):
+    """
+    thin NacbracSolver for the bot, hands every board to a running SolveService over a blocking socket.
+    Budgets are passed on by time and node limit; a cancelled budget stops the wait, the service still finishes
+    the search and caches it.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: Optional[str] = None):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.path = path
+        self._socket: Optional[socket.socket] = None
+        self._buffer = b""
+        self._ids = itertools.count()
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return self.search(gameboard).moves
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        budget = budget or SolveBudget()
+        starttime = time.perf_counter()
+        request_id = next(self._ids)
+        request = {"id": request_id, "board": str(gameboard), "time_limit": budget.time_limit, "max_nodes": budget.max_nodes}
+        deadline = starttime + budget.time_limit + RESPONSE_GRACE if budget.time_limit is not None else None
+        try:
+            self._connect().sendall((json.dumps(request) + "\n").encode())
+            while True:
+                response = self._receive(budget, deadline)
+                if response is None:
+                    # nothing to read the late answer, the next search gets a fresh connection
+                    self.close()
+                    self.stats = SolverStats(elapsed=time.perf_counter() - starttime)
+                    return SolveResult(SolveStatus.GAVE_UP, [], self.stats, "cancelled" if budget.cancellation is not None
+                                       and budget.cancellation.is_cancelled() else "time")
+                if response.get("id") == request_id:
+                    break
+        except OSError:
+            self.close()
+            raise
+        result = decode_result(response)
+        self.stats = result.stats
+        return result
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            self._buffer = b""
+
+    def _connect(self) -> socket.socket:
+        if self._socket is None:
+            if self.path is not None:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.connect(self.path)
+            else:
+                self._socket = socket.create_connection((self.host, self.port))
+            self._socket.settimeout(CANCELLATION_POLL)
+        return self._socket
+
+    def _receive(self, budget: SolveBudget, deadline: Optional[float]) -> Optional[Dict]:
+        # next response line, None once the budget is cancelled or the deadline passed
+        while b"\n" not in self._buffer:
+            if (budget.cancellation is not None and budget.cancellation.is_cancelled()) or (deadline is not None and time.perf_counter() > deadline):
+                return None
+            try:
+                received = self._socket.recv(65536)
+            except socket.timeout:
+                continue
+            if not received:
+                raise ConnectionError("Solve service closed the connection")
+            self._buffer += received
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+
+async def serve(host: str, port: int, path: Optional[str], workers: Optional[int], max_depth: int, cache_path: str) -> None:
+    service = SolveService(workers, max_depth, cache_path)
+    await service.start(host, port, path)
+    log.info(f"Serving on {service.address}")
+    try:
+        await service.serve_forever()
+    finally:
+        log.info(f"Stopping: {service.counters()}")
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve boards for the bot and batch clients, keeping solvers and the cache warm.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="solver processes, defaults to the CPU count")
+    parser.add_argument("--max-depth", type=int, default=55, help="DfsSolver search depth")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="SQLite solution cache")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.workers, args.max_depth, args.cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
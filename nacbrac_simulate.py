@@ -0,0 +1,164 @@
+import argparse
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from nacbrac import Card, DfsSolver, Gameboard, Move
+from nacbrac_backend import Point, ScreenBackend
+from nacbrac_bot import card_location, DETECTION_REGION, FOLDER, IMAGE_EXT, NacbracBot, NEXT_GAME_BUTTON, WILDCARD_SLOT_IMG_LOCATION, \
+    WILDCARD_SLOT_POINT, WIN_BANNER_REGION
+from nacbrac_vision import CARD_ROW_HEIGHT, CARD_TEMPLATES, FIELD_SLOT_WIDTH, load_image
+
+BACKGROUND_COLOR = 60.0
+CARD_COLOR = 235.0
+CARD_SIZE = (125, 190) # width, height
+# where a card's corner sprite sits on the card
+SPRITE_OFFSET = (8, 5)
+# pixels the cards of a fresh deal slide per frame
+DEAL_SLIDE = 7
+
+
+def sprite_name(card: Card) -> str:
+    if card.is_face():
+        return card.suit.value
+    return f"{card.value}{'R' if card.is_red() else 'B'}"
+
+
+class SimulatedBackend(ScreenBackend):
+    """
+    Headless game built on Gameboard, for running the whole bot without a desktop.
+    Screenshots are rendered from the card sprites in resources/ at the bot's screen geometry, drags are mapped
+    back to Moves and applied if they are legal, the win banner shows once the board is solved,
+    and pressing the next game button deals Gameboard.deal(seed) for the following seed.
+    A fresh deal slides in over deal_frames screenshots of the board.
+    """
+    def __init__(self, seed: int = 0, deal_frames: int = 0, folder: str = FOLDER, image_ext: str = IMAGE_EXT):
+        self._sprites = {name: load_image(f"{folder}{name}.{image_ext}") for name in list(CARD_TEMPLATES) + ["wildcard_slot_empty", "win"]}
+        self.deal_frames = deal_frames
+        self.seed = seed
+        self.deals = 0
+        self.moves = 0
+        self.rejected_drags = 0
+        self._deal(seed)
+
+    def screenshot(self, region: Tuple[int, int, int, int]) -> np.ndarray:
+        left, top, width, height = region
+        image = np.full((height, width, 3), BACKGROUND_COLOR)
+        slide = 0
+        if self._sliding and _overlaps(region, DETECTION_REGION):
+            slide = self._sliding * DEAL_SLIDE
+            self._sliding -= 1
+
+        for slot_idx, field_slot in enumerate(self.gameboard.field_slots):
+            for card_idx, card in enumerate(field_slot):
+                card_left = DETECTION_REGION[0] + round(slot_idx * FIELD_SLOT_WIDTH)
+                card_top = DETECTION_REGION[1] + round(card_idx * CARD_ROW_HEIGHT) + slide
+                self._draw_card(image, region, card, card_left, card_top)
+        wildcard_left, wildcard_top = WILDCARD_SLOT_IMG_LOCATION[:2]
+        if self.gameboard.wildcard_slot.has_card():
+            self._draw_card(image, region, self.gameboard.wildcard_slot.peek(), wildcard_left, wildcard_top)
+        else:
+            _paste(image, region, self._sprites["wildcard_slot_empty"], wildcard_left, wildcard_top)
+        if self.gameboard.solved():
+            banner = self._sprites["win"]
+            _paste(image, region, banner, WIN_BANNER_REGION[0] + (WIN_BANNER_REGION[2] - banner.shape[1]) // 2,
+                   WIN_BANNER_REGION[1] + (WIN_BANNER_REGION[3] - banner.shape[0]) // 2)
+        return image
+
+    def drag(self, start: Point, end: Point, duration: float) -> None:
+        move = self._move_between(start, end)
+        if move is None:
+            self.rejected_drags += 1
+            return
+        self.gameboard.execute(move)
+        self.moves += 1
+
+    def mouse_down(self, point: Point) -> None:
+        if abs(point.x - NEXT_GAME_BUTTON.x) <= 40 and abs(point.y - NEXT_GAME_BUTTON.y) <= 20:
+            self._deal(self.seed + self.deals)
+
+    def mouse_up(self) -> None:
+        pass
+
+    def _deal(self, seed: int) -> None:
+        self.gameboard = Gameboard.deal(seed)
+        self.deals += 1
+        self._sliding = self.deal_frames
+
+    def _draw_card(self, image: np.ndarray, region: Tuple[int, int, int, int], card: Card, left: int, top: int) -> None:
+        _paste(image, region, np.full((CARD_SIZE[1], CARD_SIZE[0], 3), CARD_COLOR), left, top)
+        _paste(image, region, self._sprites[sprite_name(card)], left + SPRITE_OFFSET[0], top + SPRITE_OFFSET[1])
+
+    def _slot_at(self, point: Point) -> Tuple[int, int]:
+        # (slot index, card index) of the card card_location() puts at point
+        if abs(point.x - WILDCARD_SLOT_POINT.x) < FIELD_SLOT_WIDTH / 2 and abs(point.y - WILDCARD_SLOT_POINT.y) < CARD_SIZE[1] / 2:
+            return -1, 0
+        origin = card_location(0, 0)
+        return round((point.x - origin.x) / FIELD_SLOT_WIDTH), round((point.y - origin.y) / CARD_ROW_HEIGHT)
+
+    def _move_between(self, start: Point, end: Point) -> Optional[Move]:
+        before, card_idx = self._slot_at(start)
+        after, _ = self._slot_at(end)
+        if before < 0:
+            num_cards = 1
+        elif 0 <= before < len(self.gameboard.field_slots):
+            num_cards = len(self.gameboard.field_slots[before]) - card_idx
+        else:
+            return None
+        move = Move(before, after, num_cards)
+        legal = self.gameboard.get_field_slot_moves() + self.gameboard.get_wildcard_slot_moves()
+        return move if move in legal else None
+
+
+def _overlaps(region: Tuple[int, int, int, int], other: Tuple[int, int, int, int]) -> bool:
+    return region[0] < other[0] + other[2] and other[0] < region[0] + region[2] \
+        and region[1] < other[1] + other[3] and other[1] < region[1] + region[3]
+
+
+def _paste(image: np.ndarray, region: Tuple[int, int, int, int], sprite: np.ndarray, left: int, top: int) -> None:
+    # sprite at screen position (left, top) into the screenshot image of region, clipped to it
+    x0, y0 = left - region[0], top - region[1]
+    x1, y1 = x0 + sprite.shape[1], y0 + sprite.shape[0]
+    cx0, cy0 = max(x0, 0), max(y0, 0)
+    cx1, cy1 = min(x1, image.shape[1]), min(y1, image.shape[0])
+    if cx0 < cx1 and cy0 < cy1:
+        image[cy0:cy1, cx0:cx1] = sprite[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+
+
+def run_games(games: int, seed: int = 0, pipelined: bool = False, deal_frames: int = 0, max_depth: int = 55) -> Dict:
+    """
+    plays games simulated deals with the full bot, recognition and execution included
+    """
+    backend = SimulatedBackend(seed, deal_frames)
+    bot = NacbracBot(DfsSolver(max_depth), pipelined=pipelined, backend=backend, poll_interval=0)
+    starttime = time.perf_counter()
+    bot.run(max_games=games)
+    elapsed = time.perf_counter() - starttime
+    return {
+        "games": bot.games,
+        "wins": bot.wins,
+        "win_rate": bot.wins / bot.games if bot.games else 0.0,
+        "moves": backend.moves,
+        "rejected_drags": backend.rejected_drags,
+        "elapsed": elapsed,
+        "games_per_hour": bot.games * 3600 / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the whole bot loop against a simulated game.")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--deal-frames", type=int, default=0, help="screenshots a fresh deal takes to slide in")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(run_games(args.games, args.seed, args.pipelined, args.deal_frames)))
+
+
+if __name__ == "__main__":
+    main()
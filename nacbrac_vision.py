@@ -0,0 +1,200 @@
+import argparse
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from nacbrac import Card, Gameboard
+
+# worst mean squared colour difference (0 to 1) a template match may have
+MATCH_THRESHOLD = 0.01
+# screen geometry of the field slots, the detection region starts at the top left of the first card
+FIELD_SLOT_WIDTH = 133.75
+CARD_ROW_HEIGHT = 29.33
+# template name -> card it stands for, value cards only tell red from black
+CARD_TEMPLATES = {
+    **{f"{value}R": f"{value}D" for value in range(6, 11)},
+    **{f"{value}B": f"{value}S" for value in range(6, 11)},
+    **{suit: f"0{suit}" for suit in "HDSC"},
+}
+SCREEN_TEMPLATES = ("wildcard_slot_empty", "win")
+# screen polling: seconds between polls, and the mean squared difference (0 to 1) below which two frames are the same
+POLL_INTERVAL = 0.05
+STILL_THRESHOLD = 0.0001
+# frames in a row that must be the same before the screen counts as settled
+SETTLE_FRAMES = 3
+
+
+def to_array(image: Image.Image) -> np.ndarray:
+    """
+    (height, width, 3) float RGB array of a PIL image, e.g. a pyautogui screenshot
+    """
+    return np.asarray(image.convert("RGB"), dtype=np.float64)
+
+
+def load_image(path: str) -> np.ndarray:
+    with Image.open(path) as image:
+        return to_array(image)
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    # same weights as PIL's "L" mode, which pyautogui's grayscale matching used
+    return image @ np.array([[0.299], [0.587], [0.114]])
+
+
+def frame_difference(previous: np.ndarray, frame: np.ndarray) -> float:
+    """
+    mean squared colour difference (0 to 1) of two screenshots of the same region
+    """
+    return float(((frame - previous) ** 2).mean() / 255.0 ** 2)
+
+
+def wait_until(condition: Callable[[], bool], timeout: float, poll_interval: float = POLL_INTERVAL) -> bool:
+    """
+    polls condition until it holds, False if it still doesn't after timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+def wait_until_settled(grab: Callable[[], np.ndarray], timeout: float, poll_interval: float = POLL_INTERVAL,
+                       settle_frames: int = SETTLE_FRAMES) -> bool:
+    """
+    polls screenshots from grab until settle_frames of them in a row are the same as the one before,
+    e.g. once an animation is over. False if the region still changes after timeout seconds
+    """
+    previous = grab()
+    still = 0
+    def settled() -> bool:
+        nonlocal previous, still
+        frame = grab()
+        still = still + 1 if frame_difference(previous, frame) <= STILL_THRESHOLD else 0
+        previous = frame
+        return still >= settle_frames
+    return wait_until(settled, timeout, poll_interval)
+
+
+class TemplateMatcher:
+    """
+    Matches several templates against every position of an image in one pass.
+    The sum of squared differences is expanded into correlations, which are computed with FFTs
+    of the whole image; the template spectra are kept per image size.
+    Templates may differ in size, they are padded to the largest one with a zero mask.
+    """
+    def __init__(self, templates: List[np.ndarray]):
+        self.height = max(template.shape[0] for template in templates)
+        self.width = max(template.shape[1] for template in templates)
+        channels = templates[0].shape[2]
+        self._templates = np.zeros((len(templates), self.height, self.width, channels))
+        self._masks = np.zeros((len(templates), self.height, self.width))
+        for idx, template in enumerate(templates):
+            self._templates[idx, :template.shape[0], :template.shape[1]] = template
+            self._masks[idx, :template.shape[0], :template.shape[1]] = 1.0
+        self._sizes = self._masks.sum(axis=(1, 2)) * channels * 255.0 ** 2
+        self._energies = (self._templates ** 2).sum(axis=(1, 2, 3))
+        self._spectra: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def prepare(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        template and mask spectra for images of shape (height, width), computed on first use
+        """
+        spectra = self._spectra.get(shape)
+        if spectra is None:
+            spectra = (np.conj(np.fft.rfft2(self._templates, s=shape, axes=(1, 2))),
+                       np.conj(np.fft.rfft2(self._masks, s=shape, axes=(1, 2))))
+            self._spectra[shape] = spectra
+        return spectra
+
+    def scores(self, image: np.ndarray) -> np.ndarray:
+        """
+        mean squared difference (0 to 1) of each template at each top left position of image where all templates fit,
+        shape (templates, rows, columns)
+        """
+        shape = image.shape[:2]
+        templates, masks = self.prepare(shape)
+
+        # sum((image - template)^2) = sum(image^2) - 2 * sum(image * template) + sum(template^2) over each window,
+        # both correlations go through one inverse FFT
+        cross = np.einsum("hwc,thwc->thw", np.fft.rfft2(image, axes=(0, 1)), templates)
+        energy = np.fft.rfft2((image ** 2).sum(axis=2))[np.newaxis] * masks
+        differences = np.fft.irfft2(energy - 2 * cross, s=shape, axes=(1, 2)) + self._energies[:, np.newaxis, np.newaxis]
+        rows = image.shape[0] - self.height + 1
+        columns = image.shape[1] - self.width + 1
+        return differences[:, :rows, :columns] / self._sizes[:, np.newaxis, np.newaxis]
+
+
+class BoardRecognizer:
+    """
+    Board and screen recognition on screenshots, with all templates loaded once.
+    Cards are matched in colour, the screen templates in grayscale.
+    The (height, width) of the screenshots to expect, board_size for identify() and screen_sizes per SCREEN_TEMPLATES name,
+    lets the matchers prepare for them up front.
+    """
+    def __init__(self, folder: str = "resources/", image_ext: str = "png",
+                 board_size: Optional[Tuple[int, int]] = None, screen_sizes: Optional[Dict[str, Tuple[int, int]]] = None):
+        self._cards = [Card.from_str(card) for card in CARD_TEMPLATES.values()]
+        self._card_matcher = TemplateMatcher([load_image(f"{folder}{name}.{image_ext}") for name in CARD_TEMPLATES])
+        self._screen_matchers = {name: TemplateMatcher([to_grayscale(load_image(f"{folder}{name}.{image_ext}"))])
+                                 for name in SCREEN_TEMPLATES}
+        if board_size is not None:
+            self._card_matcher.prepare(board_size)
+        for name, shape in (screen_sizes or {}).items():
+            self._screen_matchers[name].prepare(shape)
+
+    def identify(self, screenshot: np.ndarray) -> Gameboard:
+        """
+        board in a screenshot of the detection region: the best matching card template within each of the 36 card cells
+        """
+        scores = self._card_matcher.scores(screenshot)
+        best_scores = scores.min(axis=0)
+        best_cards = scores.argmin(axis=0)
+        rows, columns = best_scores.shape
+
+        field_slots: List[List[Card]] = []
+        for slot_idx in range(0, 9):
+            left = round(slot_idx * FIELD_SLOT_WIDTH)
+            right = min(round((slot_idx + 1) * FIELD_SLOT_WIDTH), columns)
+            field_slot = []
+            for card_idx in range(0, 4):
+                top = round(card_idx * CARD_ROW_HEIGHT)
+                bottom = min(round((card_idx + 1) * CARD_ROW_HEIGHT), rows)
+                cell = best_scores[top:bottom, left:right]
+                y, x = np.unravel_index(cell.argmin(), cell.shape)
+                assert cell[y, x] <= MATCH_THRESHOLD, f"Didn't find a card in slot {slot_idx} at row {card_idx}"
+                field_slot.append(self._cards[best_cards[top + y, left + x]])
+            field_slots.append(field_slot)
+
+        gameboard = Gameboard(field_slots=field_slots)
+        gameboard.validate()
+        return gameboard
+
+    def contains(self, screenshot: np.ndarray, name: str) -> bool:
+        """
+        whether one of SCREEN_TEMPLATES is somewhere in screenshot
+        """
+        return bool(self._screen_matchers[name].scores(to_grayscale(screenshot)).min() <= MATCH_THRESHOLD)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize boards in saved screenshots of the detection region.")
+    parser.add_argument("screenshots", nargs="+")
+    parser.add_argument("--resources", default="resources/")
+    args = parser.parse_args()
+
+    starttime = time.perf_counter()
+    recognizer = BoardRecognizer(args.resources)
+    print(f"loaded templates in {(time.perf_counter() - starttime) * 1000:.1f}ms")
+    for path in args.screenshots:
+        screenshot = load_image(path)
+        starttime = time.perf_counter()
+        gameboard = recognizer.identify(screenshot)
+        print(f"{path}: {gameboard} in {(time.perf_counter() - starttime) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
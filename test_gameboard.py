@@ -1,5 +1,8 @@
+import multiprocessing
+import queue
+import threading
 from unittest import TestCase
-from nacbrac import Gameboard, WildcardSlot, Card, Suit, Move
+from nacbrac import Gameboard, WildcardSlot, Card, Suit, Move, DfsSolver, MoveOrdering, HistoryOrdering, STUCK_GAMEBOARDS, pack_move, unpack_move, moved_card_code, AStarSolver, ParallelSolver, SolveBudget, SolveStatus, SolverStats, CancellationToken, TranspositionTable, BloomFilter, _parallel_solver_task
 
 SOME_INITIAL_GAMEBOARD = "_|8H,0C,0S,0S|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|7S,10C,6C,0C"
 
@@ -10,6 +13,23 @@ class TestGameboard(TestCase):
     def test__validate__valid_board(self):
         self.assertTrue(self.gameboard.validate())
 
+    def test__card__interned(self):
+        self.assertIs(Card.from_str("10D"), Card.from_str("10D"))
+        self.assertEqual(Card(10, Suit.Diamond), Card.from_str("10D"))
+        self.assertEqual("10D", str(Card.from_str("10D")))
+        self.assertIs(Card.from_str("0S"), Card.from_code(Card(0, Suit.Spade).code))
+
+    def test__card__out_of_range(self):
+        for source in ("20H", "-1S"):
+            with self.assertRaises(ValueError):
+                Card.from_str(source)
+        with self.assertRaises(ValueError):
+            Card(20, Suit.Heart)
+        with self.assertRaises(ValueError):
+            Card.from_code(64)
+        with self.assertRaises(ValueError):
+            Gameboard.from_str(SOME_INITIAL_GAMEBOARD.replace("8H", "20H", 1))
+
     def test__is_field_slot_done__valide(self):
         self.assertTrue(Gameboard._is_field_slot_done([]))
         self.assertTrue(Gameboard._is_field_slot_done([
@@ -62,6 +82,12 @@ class TestGameboard(TestCase):
             Card(10, Suit.Spade),
         ]))
 
+    def test__deal__seeded(self):
+        self.assertEqual(str(Gameboard.deal(7)), str(Gameboard.deal(7)))
+        self.assertNotEqual(str(Gameboard.deal(7)), str(Gameboard.deal(8)))
+        for seed in range(0, 20):
+            self.assertTrue(Gameboard.deal(seed).validate())
+
     def test__solved__initial_board(self):
         self.assertFalse(self.gameboard.solved())
 
@@ -73,6 +99,39 @@ class TestGameboard(TestCase):
         self.gameboard.undo(move)
         self.assertEqual(initial_hash, hash(str(self.gameboard)))
 
+    def test__encode_decode__round_trip(self):
+        key = self.gameboard.encode()
+        self.assertEqual(SOME_INITIAL_GAMEBOARD, str(Gameboard.decode(key)))
+
+        self.gameboard.execute(self.gameboard.get_wildcard_slot_moves()[0])
+        key = self.gameboard.encode()
+        self.assertEqual(str(self.gameboard), str(Gameboard.decode(key)))
+        self.assertNotEqual(key, Gameboard.from_str(SOME_INITIAL_GAMEBOARD).encode())
+
+    def test__canonical_encode__column_permutation(self):
+        permuted = Gameboard.from_str("_|7S,10C,6C,0C|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|8H,0C,0S,0S")
+        self.assertNotEqual(self.gameboard.encode(), permuted.encode())
+        self.assertEqual(self.gameboard.canonical_encode(), permuted.canonical_encode())
+        self.assertEqual(self.gameboard.canonical_encode(), self.gameboard.canonical().encode())
+
+    def test__relabel__canonical_solution(self):
+        canonical = self.gameboard.canonical()
+        solution = DfsSolver().solve(canonical)
+        self.assertTrue(solution)
+        slot_map = self.gameboard.canonical_order()
+        for move in solution:
+            self.gameboard.execute(move.relabel(slot_map))
+        self.assertTrue(self.gameboard.solved())
+
+    def test__execute_undo__slot_cache(self):
+        for move in self.gameboard.get_field_slot_moves() + self.gameboard.get_wildcard_slot_moves():
+            self.gameboard.execute(move)
+            fresh = Gameboard.from_str(str(self.gameboard))
+            self.assertEqual(fresh._run_lengths, self.gameboard._run_lengths)
+            self.assertEqual(fresh._done, self.gameboard._done)
+            self.gameboard.undo(move)
+        self.assertEqual([2, 1, 1, 1, 1, 1, 1, 1, 1], self.gameboard._run_lengths)
+
     def test__get_field_slot_moves__happy_case(self):
         expected = [Move(before=2, after=5, num_cards=1), Move(before=5, after=3, num_cards=1)]
         self.assertEqual(expected, self.gameboard.get_field_slot_moves())
@@ -86,6 +145,278 @@ class TestGameboard(TestCase):
         expected = [Move(before=1, after=-1, num_cards=1)]
         self.assertEqual(expected, self.gameboard.get_wildcard_slot_moves())
         
+    def test__select_moves__forced_move(self):
+        self.gameboard = Gameboard.from_str("_|10D,9C,8D,7C|0H,0H,0H,6D|10H,9S,8H,7S,6H|0H|10S,9D,8C,7D,6C|0S,0S,0S,0S|0D,0D,0D,0D|10C,9H,8S,7H,6S|0C,0C,0C,0C")
+        moves = self.gameboard.packed_field_slot_moves() + self.gameboard.packed_wildcard_slot_moves()
+        self.assertEqual(2, len(moves))
+        self.assertEqual([Move(before=1, after=0, num_cards=1)], [unpack_move(packed) for packed in self.gameboard.select_moves(moves)])
+        self.assertEqual(moves, self.gameboard.select_moves(moves, forced=False))
+
+    def test__select_moves__one_empty_destination(self):
+        self.gameboard = Gameboard.from_str("_|10D,9C,8D,7C,6D|10H,9S,8H,7S,6H|10S,9D,8C,7D,6C|10C,9H,8S,7H,6S|0D,0D,0D,0D,0H,0H|0S,0S,0S,0S,0H,0H|0C,0C,0C,0C||")
+        moves = self.gameboard.packed_field_slot_moves() + self.gameboard.packed_wildcard_slot_moves()
+        expected = [Move(before=4, after=5, num_cards=2), Move(before=4, after=7, num_cards=2), Move(before=5, after=4, num_cards=2), Move(before=5, after=7, num_cards=2)]
+        self.assertEqual(expected, [unpack_move(packed) for packed in self.gameboard.select_moves(moves)])
+
+    def test__moves__ordered(self):
+        for board in [SOME_INITIAL_GAMEBOARD] + STUCK_GAMEBOARDS:
+            self.gameboard = Gameboard.from_str(board)
+            generated = self.gameboard.get_field_slot_moves() + self.gameboard.get_wildcard_slot_moves()
+            stats = SolverStats()
+            selected = list(self.gameboard.moves(stats=stats))
+            self.assertEqual(generated, list(self.gameboard.moves(rules=False)))
+            self.assertEqual(len(generated), stats.field_moves + stats.wildcard_moves)
+            self.assertEqual(len(generated) - len(selected), stats.pruned_moves)
+            ordered = list(self.gameboard.moves(MoveOrdering()))
+            self.assertCountEqual(selected, ordered)
+
+        # the moves uncovering a face that can move on go first, the others stay in generation order
+        self.gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        ordered = [(move.before, move.after) for move in self.gameboard.moves(MoveOrdering())]
+        self.assertEqual([(5, 2), (5, 8), (6, 5), (3, 7), (0, -1), (1, -1)], ordered[:6])
+
+    def test__pack_move__round_trip(self):
+        self.gameboard = Gameboard.from_str(SOME_INITIAL_GAMEBOARD)
+        for packed in self.gameboard.packed_field_slot_moves() + self.gameboard.packed_wildcard_slot_moves():
+            move = unpack_move(packed)
+            self.assertEqual(self.gameboard.locate(move), move)
+            self.assertEqual(packed, pack_move(move.before, move.after, move.num_cards, move.before_idx, move.after_idx,
+                                               moved_card_code(packed), packed >> 29))
+
+    def test__dfs_solver__orderings(self):
+        for ordering in (None, MoveOrdering, HistoryOrdering):
+            for board in STUCK_GAMEBOARDS:
+                solution = DfsSolver(ordering=ordering).solve(Gameboard.from_str(board))
+                self.assertTrue(solution)
+                self.gameboard = Gameboard.from_str(board)
+                for move in solution:
+                    self.gameboard.execute(move)
+                self.assertTrue(self.gameboard.solved())
+
+    def test__history_ordering__failed_moves_last(self):
+        self.gameboard = Gameboard.from_str(SOME_INITIAL_GAMEBOARD)
+        ordering = HistoryOrdering()
+        moves = self.gameboard.packed_moves()
+        ordering.order(moves)
+        first = moves[0]
+        ordering.failed(first, 10)
+        self.assertEqual(10, ordering.history[moved_card_code(first)])
+        ordering.order(moves)
+        self.assertEqual(moved_card_code(first), moved_card_code(moves[-1]))
+
+    def test__is_dead(self):
+        # the 10S can only go into an empty slot, and the cards that could clear one bury each other
+        self.gameboard = Gameboard.from_str("10S|10S,9D,8S|0D,0D,0D,0D|8S|10D,9S,8D,7S,6D|0H,0H,0H|0H,0S,0S,0S,0S|0C,0C,0C,0C|7D,7D,10D,9S,8D,7S,6D|6S,9D,6S")
+        self.assertTrue(self.gameboard.is_dead())
+        self.gameboard = Gameboard.from_str("10S|10S,9D,8S|0D,0D,0D,0D|8S|10D,9S,8D,7S,6D|0C,0C,0C|0H,0S,0H,0H,0H|0C,0S,0S,0S|7D,7D,10D,9S,8D,7S,6D|6S,9D,6S")
+        self.assertTrue(self.gameboard.is_dead())
+        # an empty slot
+        self.gameboard = Gameboard.from_str("9D|0S,0D,0C,7D,6S|0C,0D,0H,0H|9C,9H,0D|0C,8H,10S,10D,9S|0S,7C,10C,6D||6H,0D,7S,0S,0S|8S,0H,8D,7H,6C|8C,0C,0H,10H")
+        self.assertFalse(self.gameboard.is_dead())
+        self.assertFalse(Gameboard.from_str(SOME_INITIAL_GAMEBOARD).is_dead())
+
+    def test__dfs_solver__dead_checks(self):
+        expected = DfsSolver().search(Gameboard.deal(10))
+        result = DfsSolver(dead_checks=True).search(Gameboard.deal(10))
+        # pruning dead boards only skips subtrees without a solution
+        self.assertEqual(expected.moves, result.moves)
+        self.assertLess(result.stats.nodes_expanded, expected.stats.nodes_expanded)
+        self.assertGreater(result.stats.dead_ends, 0)
+
+    def test__zobrist__incremental(self):
+        self.gameboard = Gameboard.deal(3)
+        root = self.gameboard.zobrist
+        moves = []
+        for _ in range(0, 6):
+            move = (self.gameboard.get_field_slot_moves() + self.gameboard.get_wildcard_slot_moves())[0]
+            self.gameboard.execute(move)
+            moves.append(move)
+            self.assertEqual(Gameboard.from_str(str(self.gameboard)).zobrist, self.gameboard.zobrist)
+        for move in reversed(moves):
+            self.gameboard.undo(move)
+        self.assertEqual(root, self.gameboard.zobrist)
+        # column permutations hash alike
+        wildcard, *field_slots = str(self.gameboard).split("|")
+        self.assertEqual(root, Gameboard.from_str("|".join([wildcard] + field_slots[::-1])).zobrist)
+
+    def test__transposition_table__depths(self):
+        table = TranspositionTable(bits=2)
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 5))
+        self.assertEqual(TranspositionTable.SEEN, table.visit(12345, 7))
+        # reached shallower, with more moves left below it
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 3))
+        self.assertEqual(1, table.reopened)
+        table.finish(12345, cut_off=True)
+        self.assertEqual(TranspositionTable.SEEN_CUT_OFF, table.visit(12345, 3))
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 2))
+        table.finish(12345, cut_off=False)
+        self.assertEqual(TranspositionTable.SEEN, table.visit(12345, 0))
+
+        # buckets hold two entries, these all share one
+        for key in range(1, 100):
+            table.visit(key << 2, 10)
+        self.assertEqual(TranspositionTable.SEEN, table.visit(98 << 2, 10))
+        self.assertEqual(TranspositionTable.SEEN, table.visit(99 << 2, 10))
+        self.assertEqual(TranspositionTable.NEW, table.visit(97 << 2, 10))
+        self.assertEqual(3, len(table))
+        self.assertGreater(table.evicted, 0)
+
+    def test__transposition_table__grows(self):
+        table = TranspositionTable(bits=12, initial_bits=4)
+        memory = table.memory()
+        for key in range(1, 1000):
+            self.assertEqual(TranspositionTable.NEW, table.visit(key * 0x9e3779b97f4a7c15 & 0xffffffffffffffff, key % 50))
+        self.assertEqual(0, table.evicted)
+        self.assertEqual(999, len(table))
+        self.assertGreater(table.memory(), memory)
+        for key in range(1, 1000):
+            self.assertEqual(TranspositionTable.SEEN, table.visit(key * 0x9e3779b97f4a7c15 & 0xffffffffffffffff, 50))
+
+        # the memory budget limits how far the table grows
+        gameboard = Gameboard.deal(21)
+        result = DfsSolver().search(gameboard, SolveBudget(max_memory=40000))
+        self.assertEqual((SolveStatus.GAVE_UP, "memory"), (result.status, result.reason))
+        self.assertGreater(result.stats.nodes_expanded, 1)
+        self.assertEqual(SolveStatus.SOLVED, DfsSolver().search(gameboard, SolveBudget(max_memory=10 ** 7)).status)
+
+    def test__transposition_table__deep(self):
+        table = TranspositionTable(bits=2)
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 300))
+        self.assertEqual(TranspositionTable.SEEN, table.visit(12345, 301))
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 130))
+        table.finish(12345, cut_off=True)
+        self.assertEqual(TranspositionTable.SEEN_CUT_OFF, table.visit(12345, 200))
+        self.assertEqual(TranspositionTable.NEW, table.visit(12345, 129))
+
+        for board in STUCK_GAMEBOARDS:
+            solution = DfsSolver(max_depth=300).solve(Gameboard.from_str(board))
+            self.gameboard = Gameboard.from_str(board)
+            for move in solution:
+                self.gameboard.execute(move)
+            self.assertTrue(self.gameboard.solved())
+        with self.assertRaises(ValueError):
+            DfsSolver(max_depth=TranspositionTable.MAX_DEPTH).solve(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+
+    def test__wildcard_slot_moves__wildcard_to_field(self):
+        self.gameboard = Gameboard.from_str("6D|10D,9C,8D,7C|0H,0H,0H|10H,9S,8H,7S,6H|0H|10S,9D,8C,7D,6C|0S,0S,0S,0S|0D,0D,0D,0D|10C,9H,8S,7H,6S|0C,0C,0C,0C")
+        moves = self.gameboard.get_wildcard_slot_moves()
+        self.assertEqual([(-1, 0, 3)], [(move.before, move.after, move.after_idx) for move in moves])
+        self.gameboard.execute(moves[0])
+        self.assertEqual("_", str(self.gameboard.wildcard_slot))
+
+    def test__dfs_search__suspend_resume(self):
+        stuck_board = "_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S"
+        expected = DfsSolver().solve(Gameboard.from_str(stuck_board))
+
+        search = DfsSolver().start(Gameboard.from_str(stuck_board))
+        slices = 1
+        while not search.run(50):
+            slices += 1
+        self.assertGreater(slices, 1)
+        self.assertEqual(expected, search.solution)
+        self.assertTrue(search.gameboard.solved())
+
+    def test__parallel_solver__stuck_board(self):
+        # the same workers search one board after the other
+        with ParallelSolver(processes=2, slice_nodes=50) as solver:
+            for board in STUCK_GAMEBOARDS:
+                solution = solver.solve(Gameboard.from_str(board))
+                self.assertTrue(solution)
+                self.gameboard = Gameboard.from_str(board)
+                for move in solution:
+                    self.gameboard.execute(move)
+                self.assertTrue(self.gameboard.solved())
+            workers = list(solver._workers)
+            self.assertEqual(SolveStatus.SOLVED, solver.search(Gameboard.from_str(STUCK_GAMEBOARDS[0])).status)
+            self.assertEqual(workers, solver._workers)
+
+        # running out of boards is no proof, the Bloom filter may have pruned a solution
+        with ParallelSolver(processes=2, max_depth=8) as solver:
+            result = solver.search(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+        self.assertEqual((SolveStatus.GAVE_UP, "pruned"), (result.status, result.reason))
+
+    def test__parallel_solver__crashed_worker(self):
+        class CrashingParallelSolver(ParallelSolver):
+            def _start_workers(self) -> bool:
+                started = super()._start_workers()
+                self._workers[0].terminate()
+                self._workers[0].join()
+                return started
+
+        with CrashingParallelSolver(processes=1) as solver:
+            result = solver.search(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+        self.assertEqual((SolveStatus.GAVE_UP, "error"), (result.status, result.reason))
+
+    def test__parallel_solver_task__stale_generation(self):
+        # a task of the previous search leaves the running search's state alone
+        generation, pending, idle, nodes = [multiprocessing.Value(typecode, value) for typecode, value in [("i", 2), ("i", 1), ("i", 0), ("q", 0)]]
+        bloom = BloomFilter(bytearray(1024))
+        solutions, stop = queue.Queue(), threading.Event()
+        _parallel_solver_task(1, [], Gameboard.from_str(STUCK_GAMEBOARDS[0]).encode(), queue.Queue(), solutions, stop, generation,
+                              pending, idle, nodes, bloom, 55, 50)
+        self.assertEqual((1, 0), (pending.value, nodes.value))
+        self.assertNotIn(Gameboard.from_str(STUCK_GAMEBOARDS[0]).zobrist, bloom)
+        self.assertTrue(solutions.empty())
+        self.assertFalse(stop.is_set())
+
+    def test__copy__independent(self):
+        copied = self.gameboard.copy()
+        copied.execute(copied.get_field_slot_moves()[0])
+        self.assertEqual(SOME_INITIAL_GAMEBOARD, str(self.gameboard))
+        self.assertEqual(Gameboard.from_str(str(copied)).zobrist, copied.zobrist)
+
+    def test__search__leaves_gameboard(self):
+        for solver, budget in [(DfsSolver(), None), (DfsSolver(), SolveBudget(max_nodes=5)), (DfsSolver(max_depth=3), None),
+                               (AStarSolver(), None)]:
+            self.gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+            solver.search(self.gameboard, budget)
+            self.assertEqual(STUCK_GAMEBOARDS[0], str(self.gameboard))
+            self.assertEqual(Gameboard.from_str(STUCK_GAMEBOARDS[0]).zobrist, self.gameboard.zobrist)
+
+    def test__solver_stats__progress_and_report(self):
+        self.gameboard = Gameboard.from_str("_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S")
+        # generation order, the node counts don't depend on what an ordering learns
+        solver = DfsSolver(ordering=None)
+        solver.PROGRESS_INTERVAL = 100
+        progress = []
+        solver.on_progress = lambda stats: progress.append(stats.nodes_expanded)
+        solution = solver.solve(self.gameboard)
+
+        stats = solver.stats
+        self.assertEqual([101, 201, 301, 401, 501], progress)
+        self.assertEqual(stats.nodes_expanded, sum(stats.depth_histogram))
+        self.assertEqual(len(solution) - 1, stats.max_depth)
+        # the root is recorded before any move
+        self.assertEqual(stats.moves_tried + 1, solver.visited.stored + solver.visited.reopened + stats.visited_hits)
+        self.assertIn("nodes expanded", stats.report())
+
+    def test__solve_budget__gives_up(self):
+        self.gameboard = Gameboard.from_str("_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S")
+        result = DfsSolver().search(self.gameboard, SolveBudget(max_nodes=50))
+        self.assertEqual(SolveStatus.GAVE_UP, result.status)
+        self.assertEqual("nodes", result.reason)
+        self.assertEqual([], result.moves)
+        self.assertEqual(50, result.stats.nodes_expanded)
+        self.assertEqual("_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S", str(self.gameboard))
+
+        self.assertEqual("time", AStarSolver().search(self.gameboard, SolveBudget(time_limit=0)).reason)
+        self.assertEqual("memory", DfsSolver().search(self.gameboard, SolveBudget(max_memory=1)).reason)
+        token = CancellationToken()
+        token.cancel()
+        self.assertEqual("cancelled", DfsSolver().search(self.gameboard, SolveBudget(cancellation=token)).reason)
+
+        result = DfsSolver().search(self.gameboard, SolveBudget(time_limit=60, max_nodes=10 ** 6))
+        self.assertEqual(SolveStatus.SOLVED, result.status)
+        self.assertIsNone(result.reason)
+
+    def test__astar_solver__stuck_board(self):
+        self.gameboard = Gameboard.from_str("_|6D,8S,8D,0H|0D,7S,8D,0D|0H,0C,0D,10S|0S,9S,7S,9S|6D,0S,0D,0C|0H,0S,0H,9D|0C,0S,0C,8S|7D,7D,10D,10D|6S,9D,6S,10S")
+        solution = AStarSolver().solve(self.gameboard)
+        self.assertTrue(solution)
+        for move in solution:
+            self.gameboard.execute(move)
+        self.assertTrue(self.gameboard.solved())
+
     def test__some_board(self):
         self.gameboard = Gameboard.from_str("0d10s6s10s0s6d0c9d8d7s9s0d0h7s10d0s6d0c10d0d8s0s7d0h0c8d7d0h0s0h9s9d6s0c0d8c")
         solution = [Move(before=1, after=0, num_cards=1), Move(before=2, after=4, num_cards=1), Move(before=5, after=6, num_cards=1), Move(before=5, after=8, num_cards=1), Move(before=3, after=5, num_cards=1), Move(before=2, after=3, num_cards=1), Move(before=2, after=3, num_cards=2), Move(before=1, after=2, num_cards=1), Move(before=1, after=3, num_cards=1), Move(before=1, after=5, num_cards=1), Move(before=5, after=1, num_cards=3), Move(before=5, after=0, num_cards=1), Move(before=6, after=5, num_cards=2), Move(before=8, after=7, num_cards=2), Move(before=8, after=4, num_cards=1), Move(before=2, after=8, num_cards=1), Move(before=6, after=2, num_cards=1), Move(before=2, after=0, num_cards=1), Move(before=0, after=2, num_cards=4), Move(before=0, after=2, num_cards=1), Move(before=7, after=0, num_cards=3), Move(before=6, after=7, num_cards=1), Move(before=6, after=8, num_cards=1), Move(before=0, after=6, num_cards=4), Move(before=0, after=4, num_cards=1), Move(before=3, after=0, num_cards=5), Move(before=3, after=7, num_cards=1), Move(before=3, after=5, num_cards=1), Move(before=4, after=3, num_cards=4), Move(before=7, after=4, num_cards=3), Move(before=5, after=7, num_cards=3), Move(before=4, after=5, num_cards=4), Move(before=4, after=8, num_cards=1), Move(before=4, after=5, num_cards=1), Move(before=7, after=4, num_cards=4), Move(before=1, after=7, num_cards=3), Move(before=8, after=1, num_cards=4), Move(before=8, after=6, num_cards=1)]
@@ -0,0 +1,40 @@
+import io
+import json
+from unittest import TestCase
+from nacbrac_batch import read_boards, solve_batch, solve_board
+
+SOME_INITIAL_GAMEBOARD = "_|8H,0C,0S,0S|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|7S,10C,6C,0C"
+
+class TestNacbracBatch(TestCase):
+    def test__read_boards__plain_and_jsonl(self):
+        source = io.StringIO(SOME_INITIAL_GAMEBOARD + "\n\n" + json.dumps({"board": SOME_INITIAL_GAMEBOARD, "id": "a"}) + "\n")
+        self.assertEqual([(1, SOME_INITIAL_GAMEBOARD, None), (3, SOME_INITIAL_GAMEBOARD, "a")], list(read_boards(source)))
+
+    def test__solve_board__statuses(self):
+        result = solve_board(1, SOME_INITIAL_GAMEBOARD, None, 10.0, 55)
+        self.assertEqual("solved", result["status"])
+        self.assertEqual(result["num_moves"], len(result["moves"]))
+        self.assertGreater(result["nodes_expanded"], 0)
+
+        result = solve_board(1, SOME_INITIAL_GAMEBOARD, None, -1.0, 55)
+        self.assertEqual(("timeout", "time"), (result["status"], result["reason"]))
+        self.assertEqual("invalid", solve_board(1, "garbage", None, 10.0, 55)["status"])
+        # anything else going wrong is reported for the board too
+        self.assertEqual("error", solve_board(1, 5, None, 10.0, 55)["status"])
+
+    def test__solve_batch__one_result_per_board(self):
+        source = io.StringIO("\n".join([SOME_INITIAL_GAMEBOARD] * 3 + ["garbage"]))
+        output = io.StringIO()
+        solve_batch(source, output, 1, 10.0, 55)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([1, 2, 3, 4], sorted([result["line"] for result in results]))
+
+    def test__solve_batch__malformed_lines(self):
+        malformed = [json.dumps({"board": 5}), json.dumps({"id": "a"}), "{", SOME_INITIAL_GAMEBOARD.replace("8H", "20H", 1)]
+        lines = [SOME_INITIAL_GAMEBOARD]
+        for line in malformed:
+            lines += [line, SOME_INITIAL_GAMEBOARD]
+        output = io.StringIO()
+        solve_batch(io.StringIO("\n".join(lines)), output, 1, 10.0, 55)
+        statuses = {result["line"]: result["status"] for result in map(json.loads, output.getvalue().splitlines())}
+        self.assertEqual({line_no: "invalid" if line_no % 2 == 0 else "solved" for line_no in range(1, len(lines) + 1)}, statuses)
@@ -0,0 +1,86 @@
+import random
+from unittest import TestCase
+
+from nacbrac import AStarSolver, DfsSolver, Gameboard, Move, SolveBudget, SolveStatus, STUCK_GAMEBOARDS
+from nacbrac_beam import BeamSearchSolver, BoardBatch
+
+def random_walk_boards() -> list:
+    # boards from a few random games, wildcard card and empty slots included
+    rng = random.Random(1)
+    boards = []
+    for seed in range(0, 10):
+        gameboard = Gameboard.deal(seed)
+        for _ in range(0, 40):
+            boards.append(Gameboard.decode(gameboard.encode()))
+            moves = gameboard.get_field_slot_moves() + gameboard.get_wildcard_slot_moves()
+            if not moves:
+                break
+            gameboard.execute(rng.choice(moves))
+    return boards
+
+class TestBoardBatch(TestCase):
+    def setUp(self):
+        self.boards = random_walk_boards()
+        self.batch = BoardBatch.from_gameboards(self.boards)
+
+    def test__legal_moves__match_gameboard(self):
+        boards, before, after, num_cards = self.batch.legal_moves()
+        for idx, gameboard in enumerate(self.boards):
+            expected = [(move.before, move.after, move.num_cards) for move in gameboard.get_field_slot_moves() + gameboard.get_wildcard_slot_moves()]
+            mine = boards == idx
+            self.assertEqual(expected, list(zip(before[mine].tolist(), after[mine].tolist(), num_cards[mine].tolist())))
+
+    def test__slot_caches_heuristic_zobrist__match_gameboard(self):
+        heuristics = self.batch.heuristic()
+        hashes = self.batch.zobrist()
+        for idx, gameboard in enumerate(self.boards):
+            self.assertEqual(gameboard._done, self.batch.done[idx].tolist())
+            self.assertEqual(gameboard._run_lengths, self.batch.run_lengths[idx].tolist())
+            self.assertEqual(AStarSolver.heuristic(gameboard), heuristics[idx])
+            self.assertEqual(gameboard.zobrist, int(hashes[idx]))
+            self.assertEqual(str(gameboard), str(self.batch.to_gameboard(idx)))
+
+        solved = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        for move in DfsSolver().solve(Gameboard.from_str(STUCK_GAMEBOARDS[0])):
+            solved.execute(move)
+        self.assertEqual([False, True], BoardBatch.from_gameboards([self.boards[0], solved]).solved().tolist())
+
+    def test__execute__match_gameboard(self):
+        moves = self.batch.legal_moves()
+        children = self.batch.execute(moves)
+        for idx in range(0, len(children)):
+            gameboard = Gameboard.decode(self.boards[moves[0][idx]].encode())
+            gameboard.execute(Move(int(moves[1][idx]), int(moves[2][idx]), int(moves[3][idx])))
+            self.assertEqual(str(gameboard), str(children.to_gameboard(idx)))
+
+    def test__from_gameboards__capacity(self):
+        with self.assertRaises(ValueError):
+            BoardBatch.from_gameboards([Gameboard.from_str("_|" + ",".join(["0H"] * 13) + "||||||||")])
+
+class TestBeamSearchSolver(TestCase):
+    def test__solve__stuck_board(self):
+        solution = BeamSearchSolver(beam_width=200).solve(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+        self.assertTrue(solution)
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        for move in solution:
+            self.assertEqual(gameboard.locate(move).before_idx, move.before_idx)
+            gameboard.execute(move)
+        self.assertTrue(gameboard.solved())
+
+    def test__search__limits(self):
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        result = BeamSearchSolver(max_depth=3).search(gameboard)
+        self.assertEqual(SolveStatus.UNSOLVABLE, result.status)
+        self.assertEqual(0, result.stats.pruned_moves)
+        result = BeamSearchSolver().search(gameboard, SolveBudget(max_nodes=100))
+        self.assertEqual(SolveStatus.GAVE_UP, result.status)
+        self.assertEqual("nodes", result.reason)
+        self.assertEqual(STUCK_GAMEBOARDS[0], str(gameboard))
+
+    def test__search__narrow_beam_gives_up(self):
+        gameboard = Gameboard.deal(0)
+        self.assertEqual(SolveStatus.SOLVED, DfsSolver().search(gameboard).status)
+        result = BeamSearchSolver(beam_width=1).search(gameboard)
+        self.assertEqual(SolveStatus.GAVE_UP, result.status)
+        self.assertEqual("pruned", result.reason)
+        self.assertGreater(result.stats.pruned_moves, 0)
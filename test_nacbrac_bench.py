@@ -0,0 +1,36 @@
+import multiprocessing
+from unittest import TestCase
+from nacbrac import DfsSolver, ParallelSolver
+from nacbrac_bench import build_corpus, compare, percentile, run_benchmark, run_board, summarize
+
+class TestNacbracBench(TestCase):
+    def test__percentile__nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 0.5))
+        self.assertEqual(95, percentile(values, 0.95))
+        self.assertEqual(100, percentile(values, 1.0))
+        self.assertIsNone(percentile([], 0.5))
+
+    def test__run_board__summary(self):
+        corpus = build_corpus(2)
+        self.assertEqual(["initial", "stuck:0", "stuck:1", "stuck:2", "seed:0", "seed:1"], [name for name, _ in corpus])
+        results = [run_board(DfsSolver(), name, board, 10.0, False) for name, board in corpus[:2]]
+        summary = summarize(results)
+        self.assertEqual(1.0, summary["solve_rate"])
+        self.assertGreater(summary["nodes_per_second"], 0)
+
+    def test__run_board__pruned_is_no_timeout(self):
+        _, board = build_corpus(0)[1]
+        with ParallelSolver(processes=2, max_depth=8) as solver:
+            result = run_board(solver, "stuck:0", board, 10.0, False)
+        self.assertEqual(("pruned", "pruned"), (result["status"], result["reason"]))
+
+    def test__run_benchmark__closes_solver(self):
+        report = run_benchmark("parallel", 0, 0, 10.0, False)
+        self.assertEqual(1.0, report["summary"]["solve_rate"])
+        self.assertEqual([], multiprocessing.active_children())
+
+    def test__compare__regressions(self):
+        baseline = {"solve_rate": 1.0, "median_time": 1.0, "mean_moves": 40}
+        self.assertEqual([], compare({"solve_rate": 0.9, "median_time": 1.1, "mean_moves": 40}, baseline, 0.2))
+        self.assertEqual(["median_time: 1 -> 2"], compare({"solve_rate": 1.0, "median_time": 2.0, "mean_moves": 40}, baseline, 0.2))
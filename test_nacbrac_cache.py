@@ -0,0 +1,94 @@
+import os
+import tempfile
+from typing import List
+from unittest import TestCase
+from nacbrac import DfsSolver, Gameboard, Move, NacbracSolver
+from nacbrac_beam import BeamSearchSolver
+from nacbrac_cache import CachingSolver
+
+SOME_INITIAL_GAMEBOARD = "_|8H,0C,0S,0S|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|7S,10C,6C,0C"
+PERMUTED_GAMEBOARD = "_|7S,10C,6C,0C|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|8H,0C,0S,0S"
+
+class CountingSolver(NacbracSolver):
+    def __init__(self, solver: NacbracSolver):
+        super().__init__()
+        self.solver = solver
+        self.calls = 0
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        self.calls += 1
+        return self.solver.solve(gameboard)
+
+class GiveUpSolver(NacbracSolver):
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return []
+
+class TestCachingSolver(TestCase):
+    def test__solve__hit_on_column_permutation(self):
+        inner = CountingSolver(DfsSolver())
+        solver = CachingSolver(inner, ":memory:")
+        self.assertTrue(solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD)))
+
+        gameboard = Gameboard.from_str(PERMUTED_GAMEBOARD)
+        solution = solver.solve(gameboard)
+        self.assertEqual(1, inner.calls)
+        self.assertEqual(1, solver.hits)
+        for move in solution:
+            gameboard.execute(move)
+        self.assertTrue(gameboard.solved())
+
+    def test__solve__unsolvable_marker_keeps_budget(self):
+        solver = CachingSolver(GiveUpSolver(), ":memory:", budget="1s")
+        self.assertEqual([], solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD)))
+        self.assertEqual([], solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD)))
+        self.assertEqual(1, solver.hits)
+
+        # a different budget may find a solution, so the marker doesn't count
+        solver.budget = "10s"
+        solver._solver = DfsSolver()
+        self.assertTrue(solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD)))
+        self.assertEqual(1, solver.hits)
+
+    def test__solve__narrow_beam_leaves_no_marker(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "cache.sqlite3")
+            narrow = CachingSolver(BeamSearchSolver(beam_width=1), path)
+            self.assertEqual([], narrow.solve(Gameboard.deal(0)))
+            self.assertEqual(0, len(narrow))
+            narrow.close()
+            wide = CachingSolver(BeamSearchSolver(beam_width=1000), path)
+            self.assertNotEqual(narrow.budget, wide.budget)
+            self.assertTrue(wide.solve(Gameboard.deal(0)))
+            self.assertEqual(0, wide.hits)
+            wide.close()
+
+    def test__solve__evicts_least_recently_used(self):
+        solver = CachingSolver(GiveUpSolver(), ":memory:", max_entries=1)
+        solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD))
+        solver.solve(Gameboard.from_str("0d10s6s10s0s6d0c9d8d7s9s0d0h7s10d0s6d0c10d0d8s0s7d0h0c8d7d0h0s0h9s9d6s0c0d8c"))
+        self.assertEqual(1, len(solver))
+        solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD))
+        self.assertEqual(0, solver.hits)
+
+        # storing a board again doesn't count it twice
+        solver = CachingSolver(GiveUpSolver(), ":memory:", max_entries=2)
+        solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD))
+        solver.budget = "10s"
+        solver.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD))
+        solver.solve(Gameboard.from_str("0d10s6s10s0s6d0c9d8d7s9s0d0h7s10d0s6d0c10d0d8s0s7d0h0c8d7d0h0s0h9s9d6s0c0d8c"))
+        self.assertEqual(2, len(solver))
+
+    def test__lookup__leaves_other_connections_writable(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "cache.sqlite3")
+            reader = CachingSolver(DfsSolver(), path)
+            writer = CachingSolver(GiveUpSolver(), path)
+            writer._db.execute("PRAGMA busy_timeout = 100")
+            reader.solve(Gameboard.from_str(SOME_INITIAL_GAMEBOARD))
+            self.assertTrue(reader.solve(Gameboard.from_str(PERMUTED_GAMEBOARD)))
+            self.assertEqual(1, reader.hits)
+            # the hit left no write transaction open
+            writer.solve(Gameboard.from_str("0d10s6s10s0s6d0c9d8d7s9s0d0h7s10d0s6d0c10d0d8s0s7d0h0c8d7d0h0s0h9s9d6s0c0d8c"))
+            self.assertEqual(2, len(reader))
+            reader.close()
+            writer.close()
@@ -0,0 +1,36 @@
+from unittest import TestCase
+from nacbrac import DfsSolver, Gameboard, Move, STUCK_GAMEBOARDS
+from nacbrac_optimize import optimize_solution
+
+class TestOptimizeSolution(TestCase):
+    def setUp(self):
+        self.gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        # the generation order solution, it has detours to shortcut and the wildcard slot free after 3 moves
+        self.solution = DfsSolver(ordering=None).solve(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+
+    def assertSolves(self, solution):
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        for move in solution:
+            located = gameboard.locate(move)
+            self.assertEqual((located.before_idx, located.after_idx), (move.before_idx, move.after_idx))
+            gameboard.execute(move)
+        self.assertTrue(gameboard.solved())
+
+    def test__optimize_solution__shortcuts(self):
+        optimized = optimize_solution(self.gameboard, self.solution)
+        self.assertLess(len(optimized), len(self.solution))
+        self.assertSolves(optimized)
+        self.assertEqual(STUCK_GAMEBOARDS[0], str(self.gameboard))
+
+    def test__optimize_solution__removes_detours(self):
+        # park a card in the wildcard slot and put it straight back
+        detour = [Move(before=8, after=-1, num_cards=1), Move(before=-1, after=8, num_cards=1)]
+        solution = self.solution[:3] + detour + self.solution[3:]
+        self.assertEqual(len(self.solution), len(optimize_solution(self.gameboard, solution, shortcut_depth=0)))
+
+    def test__optimize_solution__recomputes_indices(self):
+        # moves without screen positions, e.g. decoded from somewhere else
+        solution = [Move(move.before, move.after, move.num_cards) for move in self.solution]
+        optimized = optimize_solution(self.gameboard, solution, shortcut_depth=0)
+        self.assertEqual(self.solution, optimized)
+        self.assertSolves(optimized)
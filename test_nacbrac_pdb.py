@@ -0,0 +1,72 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+from nacbrac import DfsSolver, Gameboard, SolveStatus, STUCK_GAMEBOARDS
+from nacbrac_pdb import face_abstraction, PatternDatabase, PatternHeuristic, UNSOLVABLE, value_abstraction
+
+class TestPatternDatabase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # the two value pattern builds in a second, the default three value one takes minutes
+        cls.faces = PatternDatabase.build(face_abstraction())
+        cls.values = PatternDatabase.build(value_abstraction(2))
+        cls.heuristic = PatternHeuristic([cls.faces, cls.values])
+
+    def test__lower_bound__admissible(self):
+        for board in STUCK_GAMEBOARDS + [str(Gameboard.deal(seed)) for seed in range(0, 5)]:
+            solution = DfsSolver().solve(Gameboard.from_str(board))
+            gameboard = Gameboard.from_str(board)
+            for idx, move in enumerate(solution):
+                self.assertLessEqual(self.heuristic(gameboard), len(solution) - idx)
+                gameboard.execute(move)
+            self.assertEqual(0, self.heuristic(gameboard))
+
+    def test__abstraction__relaxes_real_moves(self):
+        # a real move leaves each abstract board as it is or makes an abstract move,
+        # and the distances agree with the abstract moves forwards
+        rng = random.Random(2)
+        for database in (self.faces, self.values):
+            abstraction = database.abstraction
+            gameboard = Gameboard.deal(7)
+            for _ in range(0, 30):
+                keys = abstraction.keys(gameboard.encode())
+                distances = database.distances_of(keys)
+                for key, distance in zip(keys, distances):
+                    self.assertNotEqual(UNSOLVABLE, distance)
+                    if distance:
+                        self.assertEqual(distance - 1, database.distances_of(list(abstraction.successors(key))).min())
+                moves = gameboard.get_field_slot_moves() + gameboard.get_wildcard_slot_moves()
+                if not moves:
+                    break
+                gameboard.execute(rng.choice(moves))
+                for key, moved_key in zip(keys, abstraction.keys(gameboard.encode())):
+                    self.assertTrue(moved_key == key or moved_key in abstraction.successors(key))
+
+    def test__save_load__round_trip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "faces.pdb")
+            self.faces.save(path)
+            loaded = PatternDatabase.load(face_abstraction(), path)
+            self.assertEqual(len(self.faces), len(loaded))
+            for seed in range(0, 5):
+                self.assertEqual(self.faces.lookup(Gameboard.deal(seed)).tolist(), loaded.lookup(Gameboard.deal(seed)).tolist())
+            with self.assertRaises(ValueError):
+                PatternDatabase.load(value_abstraction(2), path)
+
+    def test__dfs_solver__lower_bound(self):
+        bounded = DfsSolver(max_depth=40, lower_bound=self.heuristic)
+        for board in STUCK_GAMEBOARDS:
+            result = bounded.search(Gameboard.from_str(board))
+            self.assertEqual(SolveStatus.SOLVED, result.status)
+            gameboard = Gameboard.from_str(board)
+            for move in result.moves:
+                gameboard.execute(move)
+            self.assertTrue(gameboard.solved())
+
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        result = DfsSolver(max_depth=8, lower_bound=self.heuristic).search(gameboard)
+        self.assertEqual(SolveStatus.UNSOLVABLE, result.status)
+        self.assertTrue(result.stats.bounded)
+        self.assertLess(result.stats.nodes_expanded, DfsSolver(max_depth=8).search(gameboard).stats.nodes_expanded)
@@ -0,0 +1,54 @@
+import threading
+import time
+from typing import List, Optional
+from unittest import TestCase
+from nacbrac import DfsSolver, Gameboard, Move, NacbracSolver, SolveBudget, SolveResult, SolveStatus, STUCK_GAMEBOARDS
+from nacbrac_cache import CachingSolver
+from nacbrac_optimize import optimize_solution
+from nacbrac_pipeline import SolveWorker
+
+class BlockingSolver(NacbracSolver):
+    # searches until it is cancelled
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+
+    def solve(self, gameboard: Gameboard) -> List[Move]:
+        return []
+
+    def search(self, gameboard: Gameboard, budget: Optional[SolveBudget] = None) -> SolveResult:
+        self.started.set()
+        while budget.exceeded(self.stats) is None:
+            time.sleep(0.01)
+        return SolveResult(SolveStatus.GAVE_UP, [], self.stats, budget.exceeded(self.stats))
+
+class TestSolveWorker(TestCase):
+    def test__submit__streams_optimized_solution(self):
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        expected = optimize_solution(gameboard, DfsSolver().solve(Gameboard.from_str(STUCK_GAMEBOARDS[0])))
+        with SolveWorker(CachingSolver(DfsSolver(), ":memory:")) as worker:
+            first = worker.submit(gameboard)
+            second = worker.submit(gameboard)
+            self.assertEqual(expected, list(first))
+            self.assertEqual(SolveStatus.SOLVED, first.result.status)
+            self.assertEqual(expected, first.result.moves)
+            # the cache was filled from the worker thread
+            self.assertEqual(expected, second.wait().moves)
+        self.assertEqual(STUCK_GAMEBOARDS[0], str(gameboard))
+
+    def test__submit__no_solution(self):
+        gameboard = Gameboard.from_str(STUCK_GAMEBOARDS[0])
+        with SolveWorker(DfsSolver(max_depth=3)) as worker:
+            job = worker.submit(gameboard)
+            self.assertEqual([], list(job))
+            self.assertEqual(SolveStatus.UNSOLVABLE, job.result.status)
+
+    def test__close__cancels_search(self):
+        solver = BlockingSolver()
+        worker = SolveWorker(solver)
+        running = worker.submit(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+        queued = worker.submit(Gameboard.from_str(STUCK_GAMEBOARDS[0]))
+        self.assertTrue(solver.started.wait(5))
+        worker.close()
+        self.assertEqual("cancelled", running.wait().reason)
+        self.assertEqual("cancelled", queued.wait().reason)
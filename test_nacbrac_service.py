@@ -0,0 +1,66 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from nacbrac import CancellationToken, Gameboard, SolveBudget, SolveStatus, STUCK_GAMEBOARDS
+from nacbrac_service import ServiceClient, ServiceSolver, SolveService
+
+SOME_INITIAL_GAMEBOARD = "_|8H,0C,0S,0S|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|7S,10C,6C,0C"
+PERMUTED_GAMEBOARD = "_|7S,10C,6C,0C|0H,8D,0S,0D|10H,6H,10D,7H|0H,0S,9D,9H|7D,0H,0C,0H|9S,7C,8C,8S|0D,0D,0C,6D|6S,10S,0D,9C|8H,0C,0S,0S"
+
+class TestSolveService(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "service.sock")
+        self.service = SolveService(workers=1, cache_path=":memory:")
+        await self.service.start(path=self.path)
+        self.client = await ServiceClient.connect(path=self.path)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.service.close()
+        self.folder.cleanup()
+
+    def assertSolves(self, board: str, moves) -> None:
+        gameboard = Gameboard.from_str(board)
+        for move in moves:
+            self.assertEqual(gameboard.locate(move), move)
+            gameboard.execute(move)
+        self.assertTrue(gameboard.solved())
+
+    async def test__search__coalesced_then_cached(self):
+        # the same deal and a column permutation of it at once share one search
+        first, permuted = await asyncio.gather(self.client.search(SOME_INITIAL_GAMEBOARD, 10.0), self.client.search(PERMUTED_GAMEBOARD, 10.0))
+        self.assertEqual(SolveStatus.SOLVED, first.status)
+        self.assertSolves(SOME_INITIAL_GAMEBOARD, first.moves)
+        self.assertSolves(PERMUTED_GAMEBOARD, permuted.moves)
+
+        again = await self.client.search(PERMUTED_GAMEBOARD, 10.0)
+        self.assertEqual([(move.before, move.after, move.num_cards) for move in permuted.moves],
+                         [(move.before, move.after, move.num_cards) for move in again.moves])
+        stats = await self.client.stats()
+        self.assertEqual({"requests": 3, "cache_hits": 1, "solves": 1, "coalesced": 1, "in_flight": 0}, stats)
+
+    async def test__search__budget_and_errors(self):
+        result = await self.client.search(STUCK_GAMEBOARDS[0], max_nodes=100)
+        self.assertEqual(SolveStatus.GAVE_UP, result.status)
+        self.assertEqual("nodes", result.reason)
+        with self.assertRaises(ValueError):
+            await self.client.search("garbage")
+        # a search that gave up isn't cached
+        self.assertEqual(SolveStatus.SOLVED, (await self.client.search(STUCK_GAMEBOARDS[0], 10.0)).status)
+
+    async def test__service_solver__blocking_client(self):
+        solver = ServiceSolver(path=self.path)
+        result = await asyncio.to_thread(solver.search, Gameboard.from_str(SOME_INITIAL_GAMEBOARD), SolveBudget(time_limit=10.0))
+        self.assertEqual(SolveStatus.SOLVED, result.status)
+        self.assertSolves(SOME_INITIAL_GAMEBOARD, result.moves)
+
+        # the wait ends, the search goes on in the service
+        token = CancellationToken()
+        token.cancel()
+        result = await asyncio.to_thread(solver.search, Gameboard.from_str(STUCK_GAMEBOARDS[1]), SolveBudget(time_limit=600.0, cancellation=token))
+        self.assertEqual(SolveStatus.GAVE_UP, result.status)
+        self.assertEqual("cancelled", result.reason)
+        solver.close()
@@ -0,0 +1,49 @@
+from unittest import TestCase
+from nacbrac import Gameboard
+from nacbrac_bot import card_location, DETECTION_REGION, NEXT_GAME_BUTTON, WIN_BANNER_REGION
+from nacbrac_simulate import run_games, SimulatedBackend
+from nacbrac_vision import BoardRecognizer
+
+class TestSimulatedBackend(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.recognizer = BoardRecognizer()
+
+    def setUp(self):
+        self.backend = SimulatedBackend(seed=4)
+
+    def test__screenshot__recognized(self):
+        recognized = self.recognizer.identify(self.backend.screenshot(DETECTION_REGION))
+        # value cards are only told apart by colour
+        self.assertEqual([[(card.value, card.is_red()) for card in field_slot] for field_slot in Gameboard.deal(4).field_slots],
+                         [[(card.value, card.is_red()) for card in field_slot] for field_slot in recognized.field_slots])
+        self.assertFalse(self.recognizer.contains(self.backend.screenshot(WIN_BANNER_REGION), "win"))
+
+    def test__drag__applies_legal_moves(self):
+        gameboard = Gameboard.deal(4)
+        move = (gameboard.get_field_slot_moves() + gameboard.get_wildcard_slot_moves())[0]
+        move = gameboard.locate(move)
+        self.backend.drag(card_location(move.before, move.before_idx), card_location(move.after, move.after_idx), 0.1)
+        gameboard.execute(move)
+        self.assertEqual(str(gameboard), str(self.backend.gameboard))
+
+        # dropping a card back onto its own slot isn't a move
+        self.backend.drag(card_location(0, 3), card_location(0, 5), 0.1)
+        self.assertEqual(1, self.backend.rejected_drags)
+        self.assertEqual(str(gameboard), str(self.backend.gameboard))
+
+    def test__mouse_down__next_deal(self):
+        self.backend.mouse_down(NEXT_GAME_BUTTON)
+        self.backend.mouse_up()
+        self.assertEqual(str(Gameboard.deal(5)), str(self.backend.gameboard))
+
+class TestRunGames(TestCase):
+    def test__run_games__wins(self):
+        result = run_games(3, seed=4)
+        self.assertEqual(3, result["games"])
+        self.assertEqual(3, result["wins"])
+        self.assertEqual(0, result["rejected_drags"])
+
+    def test__run_games__pipelined_with_deal_animation(self):
+        result = run_games(3, seed=4, pipelined=True, deal_frames=3)
+        self.assertEqual(3, result["wins"])
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from PIL import Image
+
+from nacbrac import Card, Gameboard
+from nacbrac_vision import BoardRecognizer, CARD_ROW_HEIGHT, FIELD_SLOT_WIDTH, load_image, wait_until, wait_until_settled
+
+DETECTION_SIZE = (124, 1120)
+
+def template_name(card: Card) -> str:
+    if card.is_face():
+        return card.suit.value
+    return f"{card.value}{'R' if card.is_red() else 'B'}"
+
+def recognized_as(card: Card) -> str:
+    # value cards are only told apart by colour
+    if card.is_face():
+        return str(card)
+    return f"{card.value}{'D' if card.is_red() else 'S'}"
+
+def draw_board(gameboard: Gameboard) -> np.ndarray:
+    # card faces with a little noise, each card's corner a few pixels into its cell
+    screenshot = np.random.default_rng(0).normal(235.0, 3.0, DETECTION_SIZE + (3,))
+    for slot_idx, field_slot in enumerate(gameboard.field_slots):
+        for card_idx, card in enumerate(field_slot):
+            template = load_image(f"resources/{template_name(card)}.png")
+            top = round(card_idx * CARD_ROW_HEIGHT) + 5
+            left = round(slot_idx * FIELD_SLOT_WIDTH) + 8
+            screenshot[top:top + template.shape[0], left:left + template.shape[1]] = template
+    return screenshot
+
+class TestBoardRecognizer(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.recognizer = BoardRecognizer()
+
+    def test__identify__drawn_boards(self):
+        for seed in range(0, 3):
+            gameboard = Gameboard.deal(seed)
+            expected = [[recognized_as(card) for card in field_slot] for field_slot in gameboard.field_slots]
+            recognized = self.recognizer.identify(draw_board(gameboard))
+            self.assertEqual(expected, [[str(card) for card in field_slot] for field_slot in recognized.field_slots])
+
+    def test__identify__saved_screenshot(self):
+        gameboard = Gameboard.deal(5)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "deal.png")
+            Image.fromarray(draw_board(gameboard).clip(0, 255).astype(np.uint8)).save(path)
+            recognized = self.recognizer.identify(load_image(path))
+        self.assertEqual([recognized_as(card) for card in gameboard.field_slots[0]], [str(card) for card in recognized.field_slots[0]])
+
+    def test__identify__missing_card(self):
+        screenshot = draw_board(Gameboard.deal(0))
+        screenshot[:30, :130] = 235.0
+        with self.assertRaises(AssertionError):
+            self.recognizer.identify(screenshot)
+
+    def test__contains(self):
+        banner = np.full((75, 530, 3), 40.0)
+        self.assertFalse(self.recognizer.contains(banner, "win"))
+        banner[10:62, 20:510] = load_image("resources/win.png")
+        self.assertTrue(self.recognizer.contains(banner, "win"))
+
+class TestWaiting(TestCase):
+    def test__wait_until_settled__animation(self):
+        # a card sliding in for 5 frames, then still
+        frames = []
+        for step in range(0, 10):
+            frame = np.full((40, 200, 3), 235.0)
+            left = min(step, 5) * 30
+            frame[5:35, left:left + 25] = 40.0
+            frames.append(frame)
+        grabbed = []
+        self.assertTrue(wait_until_settled(lambda: grabbed.append(None) or frames[len(grabbed) - 1], timeout=5, poll_interval=0))
+        # settled on the third frame in a row equal to the last one of the animation
+        self.assertEqual(9, len(grabbed))
+        grabbed = []
+        self.assertFalse(wait_until_settled(lambda: grabbed.append(None) or frames[len(grabbed) % 2], timeout=0.05, poll_interval=0.01))
+
+    def test__wait_until__timeout(self):
+        self.assertFalse(wait_until(lambda: False, timeout=0.05, poll_interval=0.01))
+        calls = []
+        self.assertTrue(wait_until(lambda: calls.append(None) or len(calls) == 3, timeout=5, poll_interval=0))